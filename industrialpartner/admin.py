@@ -1,5 +1,32 @@
 from django.contrib import admin
-from .models import Product
+from django.db.models import Q
+from django.utils import timezone
+from .models import Product, CatalogSyncRun, QuoteOutbox
 
-admin.site.register(Product)
+admin.site.register(CatalogSyncRun)
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('PartNumber', 'featured', 'featured_order', 'created_at')
+    list_editable = ('featured', 'featured_order')
+    list_filter = ('featured',)
+    search_fields = ('PartNumber',)
+
+
+@admin.register(QuoteOutbox)
+class QuoteOutboxAdmin(admin.ModelAdmin):
+    list_display = ('key', 'kind', 'status', 'quote_id', 'attempts', 'next_attempt_at', 'created_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('key', 'quote_id')
+    actions = ['retry_now']
+
+    @admin.action(description="Retry delivery now")
+    def retry_now(self, request, queryset):
+        # Follow-ups that failed along with their quote are retried with it
+        QuoteOutbox.objects.filter(
+            Q(pk__in=queryset) | Q(parent__in=queryset, status=QuoteOutbox.FAILED)
+        ).exclude(status=QuoteOutbox.DELIVERED).update(
+            status=QuoteOutbox.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
 # Register your models here.
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class IndustrialpartnerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'industrialpartner'
+
+    def ready(self):
+        from . import signals
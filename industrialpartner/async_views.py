@@ -0,0 +1,153 @@
+# industrialpartner/async_views.py
+"""
+Async versions of the catalog-backed views, used when the site is served
+through ``industrialpartner_app.asgi`` with ``CATALOG_ASYNC_VIEWS`` enabled.
+
+Upstream calls that do not depend on each other are issued concurrently, so
+page latency is the slowest call rather than the sum of them, and a worker
+keeps serving other requests while it waits on the catalog API.  Rendering
+still goes through the synchronous helpers in ``views`` because templates,
+context processors and the ORM are sync-only.
+"""
+
+import asyncio
+import functools
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+
+from . import catalog, search
+from .middleware import CatalogCacheMiddleware
+from .views import (
+    get_manufacturer_subdomain,
+    manufacturer_lookup_params,
+    render_all_product_page,
+    render_filter_page,
+    render_index_page,
+    render_manufacturer_page,
+    render_product_page,
+    render_search_page,
+    render_sitemap_page,
+)
+
+
+def async_cache_page(timeout):
+    """
+    ``cache_page`` for async views; Django 4.2's decorator only wraps sync views.
+    """
+    def decorator(view_func):
+        middleware = CatalogCacheMiddleware(lambda request: None, page_timeout=timeout)
+
+        @functools.wraps(view_func)
+        async def _wrapper_view(request, *args, **kwargs):
+            response = await sync_to_async(middleware.process_request)(request)
+            if response is not None:
+                return response
+            response = await view_func(request, *args, **kwargs)
+            return await sync_to_async(middleware.process_response)(request, response)
+
+        return _wrapper_view
+    return decorator
+
+
+async def fetch_data(path, params=None):
+    return await catalog.aget_json(path, params) or {}
+
+
+async def get_paginated_data(path, page, additional_params=None):
+    params = dict(additional_params or {}, page=page)
+    return await fetch_data(path, params)
+
+
+@async_cache_page(60 * 15)  # Cache the view for 15 minutes
+async def home(request):
+    subdomain = get_manufacturer_subdomain(request)
+
+    page_number = request.GET.get('page', 1)
+    part_number = request.GET.get('part_number', '')
+    brand_name = request.GET.get('brand_name', '')
+
+    manufacturers_call = get_paginated_data('/manufacturer', page_number, {'brand_name': brand_name})
+
+    if subdomain:
+        manufacturer = subdomain.upper()
+        additional_params = manufacturer_lookup_params(manufacturer, part_number)
+        # The manufacturer listing is the fallback when the subdomain has no
+        # items, so ask for both at once instead of one after the other
+        data, manufacturers = await asyncio.gather(
+            get_paginated_data('/items', page_number, additional_params),
+            manufacturers_call,
+        )
+
+        if not data.get('items'):
+            return await sync_to_async(render_index_page)(request, manufacturers, brand_name, page_number)
+        else:
+            return await sync_to_async(render_manufacturer_page)(request, data, manufacturer, page_number, part_number)
+    else:
+        data = await manufacturers_call
+        return await sync_to_async(render_index_page)(request, data, brand_name, page_number)
+
+
+@async_cache_page(60 * 30)  # Cache the view for 30 minutes
+async def product(request, item_id, slug):
+    try:
+        item_data = await catalog.afetch_json(f"/items/{item_id}")
+    except httpx.HTTPError as e:
+        error_message = f"Failed to fetch data from API: {str(e)}"
+        return HttpResponse(error_message, status=catalog.error_status(e))
+
+    # Check if the provided slug matches the slug from the API
+    if slug != item_data.get('Slug'):
+        return HttpResponse("Invalid slug", status=404)
+
+    #For Related Product
+    data = await get_paginated_data('/items', 1, {'manufacturer_id': item_data['Manufacturer']['ManufacturerID']})
+
+    return await sync_to_async(render_product_page)(request, item_data, data)
+
+
+async def all_product(request):
+    page_number = request.GET.get('page', 1)
+    data = await get_paginated_data('/items', page_number)
+    return await sync_to_async(render_all_product_page)(request, data, page_number)
+
+
+async def search_items(request):
+    part_number = request.GET.get('part_number', '')
+    page_number = request.GET.get('page', 1)
+
+    if part_number and await sync_to_async(search.is_available)():
+        data = await sync_to_async(search.search)(part_number, page_number)
+    elif part_number:
+        try:
+            data = await catalog.afetch_json('/items', {'part_number': part_number, 'page': page_number})
+        except httpx.HTTPError as e:
+            return HttpResponse(f"Failed to fetch data from API: {str(e)}", status=catalog.error_status(e))
+    else:
+        data = {}
+
+    return await sync_to_async(render_search_page)(request, data, part_number)
+
+
+async def filter_view(request):
+    manufacturer = request.GET.get('manufacturer', '')
+    simpletype = request.GET.get('simpletype', '')
+    page_number = request.GET.get('page', 1)
+
+    params = {
+        'manufacturer': manufacturer,
+        'simpletype': simpletype,
+    }
+    data = await get_paginated_data('/items', page_number, params)
+    return await sync_to_async(render_filter_page)(request, data, manufacturer, simpletype, page_number)
+
+
+async def sitemap_products(request, manufacturer):
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        page = int(request.GET.get('page', 1))
+        data = await get_paginated_data('/items', page, {'manufacturer_lookup': manufacturer})
+        return JsonResponse({'items': data.get('items', [])})
+
+    data = await get_paginated_data('/items', 1, {'manufacturer_lookup': manufacturer})
+    return await sync_to_async(render_sitemap_page)(request, manufacturer, data)
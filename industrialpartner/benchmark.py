@@ -0,0 +1,257 @@
+# industrialpartner/benchmark.py
+"""
+End-to-end load benchmark of the site.
+
+The bench_load management command starts the stub catalog API (see
+``industrialpartner.stubcatalog``) and the site under gunicorn pointed at it,
+then ``run`` has ``concurrency`` simulated visitors walk through ``journey``
+over and over for a fixed time: the home page, a manufacturer subdomain,
+a product, search, the manufacturer/type filter, add to cart, the cart and a
+quote request.  Every visitor keeps its own cookies, so carts and sessions
+behave as in production.  Their sessions and quote requests are written to
+the configured database, so point the settings at a development one.
+
+The workload comes from the fixture file, so re-recording the fixtures
+changes it consistently: products are its ``/items/<id>`` entries, and
+subdomains, searches and filters are the ``manufacturer_lookup``,
+``part_number`` and ``manufacturer``/``simpletype`` queries it recorded.
+
+``summarize`` turns the timings into machine-readable results (p50, p95 and
+p99 latency and throughput per step and overall) and ``compare`` checks them
+against an earlier run to catch regressions before a deploy.
+"""
+
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+import requests
+from django.conf import settings
+
+REDIRECT = (301, 302)
+
+
+@dataclass
+class Step:
+    name: str
+    method: str
+    path: str
+    host: str = ''  # subdomain label, '' for the main site
+    data: dict = None
+    referer: str = None
+    expect: tuple = (200,)
+
+
+class Workload:
+    def __init__(self, fixtures):
+        self.items = [item for item in fixtures.items() if item.get('Slug')]
+        queries = [entry.get('params', {}) for entry in fixtures.responses if entry['path'] == '/items']
+        self.subdomains = sorted({q['manufacturer_lookup'].lower() for q in queries if q.get('manufacturer_lookup')})
+        self.searches = sorted({q['part_number'] for q in queries if q.get('part_number')})
+        self.filters = sorted({
+            (q['manufacturer'], q['simpletype']) for q in queries if q.get('manufacturer') and q.get('simpletype')
+        })
+        if not self.items:
+            raise ValueError("The fixtures contain no /items/<id> responses")
+
+    def journey(self, rng):
+        """
+        Returns the steps of one visit.
+        """
+        item = rng.choice(self.items)
+        product = f"/product/{item['ItemID']}/{item['Slug']}"
+        steps = [Step('home', 'GET', '/')]
+        if self.subdomains:
+            steps.append(Step('home_subdomain', 'GET', '/', host=rng.choice(self.subdomains)))
+        steps.append(Step('product', 'GET', product))
+        if self.searches:
+            steps.append(Step('search', 'GET', '/search/', data={'part_number': rng.choice(self.searches)}))
+        if self.filters:
+            manufacturer, simpletype = rng.choice(self.filters)
+            steps.append(Step('filter', 'GET', '/filtered', data={'manufacturer': manufacturer, 'simpletype': simpletype}))
+        steps += [
+            Step('add_to_cart', 'GET', f"/add_to_cart/{item['ItemID']}/", referer=product, expect=REDIRECT),
+            Step('cart', 'GET', '/cart'),
+            Step('quote_request', 'POST', '/quote_request', data={
+                'first_name': 'Load', 'last_name': 'Test', 'company': 'Benchmark', 'phone': '5550100',
+                'email': 'loadtest@example.com', 'item_id': item['ItemID'], 'quantity': 1,
+                'notes': '', 'comments': 'Benchmark run, please ignore',
+            }, expect=REDIRECT),
+        ]
+        return steps
+
+
+def _send(session, base_url, host, step, timeout):
+    headers = {'Host': f"{step.host}.{host}" if step.host else host}
+    if step.referer:
+        headers['Referer'] = f"http://{headers['Host']}{step.referer}"
+    if step.method == 'GET':
+        response = session.get(base_url + step.path, params=step.data, headers=headers, allow_redirects=False, timeout=timeout)
+    else:
+        response = session.post(base_url + step.path, data=step.data, headers=headers, allow_redirects=False, timeout=timeout)
+    # Read the whole body, as a browser would, before the clock stops
+    response.content
+    return response.status_code
+
+
+def run(base_url, workload, concurrency, duration, warmup=0.0, host='localhost', timeout=30, seed=None):
+    """
+    Drives the site with ``concurrency`` visitors for ``warmup`` plus
+    ``duration`` seconds.
+
+    Returns:
+        tuple: ``samples`` ({step name: [(seconds, ok), ...]}) of the
+        requests started after the warmup, and the measured window in
+        seconds.
+    """
+    base_url = base_url.rstrip('/')
+    start = time.monotonic()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+    samples = defaultdict(list)
+    lock = threading.Lock()
+
+    def visitor(index):
+        rng = random.Random(None if seed is None else seed + index)
+        with requests.Session() as session:
+            while time.monotonic() < deadline:
+                for step in workload.journey(rng):
+                    began = time.monotonic()
+                    if began >= deadline:
+                        return
+                    try:
+                        ok = _send(session, base_url, host, step, timeout) in step.expect
+                    except requests.RequestException:
+                        ok = False
+                    elapsed = time.monotonic() - began
+                    if began >= measure_from:
+                        with lock:
+                            samples[step.name].append((elapsed, ok))
+
+    threads = [threading.Thread(target=visitor, args=(n,), daemon=True) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return dict(samples), max(time.monotonic() - measure_from, 1e-9)
+
+
+def percentile(values, p):
+    # Nearest-rank percentile of sorted values
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+def _stats(timings, window):
+    latencies = sorted(seconds for seconds, _ in timings)
+    errors = sum(1 for _, ok in timings if not ok)
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'error_rate': round(errors / len(timings), 4),
+        'throughput_rps': round(len(timings) / window, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2),
+    }
+
+
+def summarize(samples, window, config=None):
+    """
+    Returns the results of a run as a JSON-serializable dict.
+    """
+    everything = [timing for timings in samples.values() for timing in timings]
+    return {
+        'config': config or {},
+        'duration_s': round(window, 2),
+        'overall': _stats(everything, window) if everything else {},
+        'steps': {name: _stats(timings, window) for name, timings in sorted(samples.items()) if timings},
+    }
+
+
+def compare(results, baseline, max_regression=0.2, max_error_rate=0.01):
+    """
+    Compares ``results`` with an earlier run.
+
+    Args:
+        max_regression (float): Allowed relative increase of p95 latency (and
+            decrease of throughput), e.g. 0.2 for 20%.
+        max_error_rate (float): Allowed share of failed requests in any step.
+
+    Returns:
+        list: Descriptions of the regressions found; empty if none.
+    """
+    problems = []
+    rows = {'overall': results['overall'], **results['steps']}
+    base_rows = {'overall': baseline.get('overall', {}), **baseline.get('steps', {})}
+    for name, row in rows.items():
+        if row.get('error_rate', 0) > max_error_rate:
+            problems.append(f"{name}: {row['error_rate']:.1%} of requests failed")
+        base = base_rows.get(name)
+        if not base:
+            continue
+        if row['p95_ms'] > base['p95_ms'] * (1 + max_regression):
+            problems.append(f"{name}: p95 {base['p95_ms']}ms -> {row['p95_ms']}ms")
+    base_rps = baseline.get('overall', {}).get('throughput_rps')
+    if base_rps and results['overall'].get('throughput_rps', 0) < base_rps * (1 - max_regression):
+        problems.append(f"throughput {base_rps} -> {results['overall'].get('throughput_rps', 0)} requests/s")
+    return problems
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start(command, log_path, env=None, cwd=None):
+    """
+    Starts a server process with its output going to ``log_path``.
+    """
+    log = open(log_path, 'wb')
+    try:
+        return subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, env=env, cwd=cwd)
+    finally:
+        log.close()
+
+
+def wait_until_up(url, process, timeout=60):
+    """
+    Waits until ``url`` answers at all.
+
+    Raises:
+        RuntimeError: If ``process`` exits or ``timeout`` passes first.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args[0]} exited with status {process.returncode}")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def stop(process):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def manage_command(*args):
+    # manage.py in a child process, with the same settings module and path
+    return [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), *args]
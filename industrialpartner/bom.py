@@ -0,0 +1,195 @@
+# industrialpartner/bom.py
+"""
+Bill of materials (BOM) uploads.
+
+``read_bom`` parses a CSV with part number and quantity columns row by row,
+and ``resolve_bom`` looks the part numbers up in the catalog: through the
+local full-text index when it is available, otherwise through the API's
+``/items?part_number=`` listing, which goes through the catalog data cache.
+Lookups run on a bounded thread pool, once per distinct normalized part
+number, so a BOM that repeats a part costs one lookup.
+
+Each line comes back as matched (exactly one catalog item has that part
+number), ambiguous (several items do, or only near matches were found),
+unmatched, or unavailable when the catalog could not be asked (API down or
+its circuit open), which says nothing about the part number itself.
+"""
+
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.db import connection
+
+from . import catalog, search
+from .search import normalize_part_number
+
+MATCHED = 'matched'
+AMBIGUOUS = 'ambiguous'
+UNMATCHED = 'unmatched'
+UNAVAILABLE = 'unavailable'
+
+# Header names recognized for each column, compared without case or separators
+PART_NUMBER_HEADERS = {'PARTNUMBER', 'PARTNO', 'PART', 'PN', 'MPN', 'MFRPARTNUMBER', 'ITEM', 'MODEL'}
+QUANTITY_HEADERS = {'QTY', 'QUANTITY', 'QNTY', 'AMOUNT', 'COUNT'}
+
+
+class BOMError(ValueError):
+    """
+    Raised for a file that cannot be read as a BOM at all.
+    """
+
+
+def _columns(row):
+    # Returns (part number column, quantity column) if ``row`` is a header
+    names = [normalize_part_number(cell) for cell in row]
+    part = next((i for i, name in enumerate(names) if name in PART_NUMBER_HEADERS), None)
+    quantity = next((i for i, name in enumerate(names) if name in QUANTITY_HEADERS), None)
+    if part is None:
+        return None
+    return part, quantity
+
+
+def _quantity(value):
+    try:
+        quantity = int(float((value or '').strip() or 1))
+    except (ValueError, OverflowError):
+        return None
+    return quantity if quantity > 0 else None
+
+
+def read_bom(upload):
+    """
+    Parses an uploaded CSV file.  A header row naming the columns is
+    optional; without one the first column is the part number and the
+    second the quantity (1 when missing).
+
+    Returns:
+        tuple: The BOM lines as dicts with ``line``, ``part_number`` and
+        ``quantity``, and a list of rows that were skipped with the reason.
+
+    Raises:
+        BOMError: If the file is not text or has more than
+            ``settings.BOM_MAX_LINES`` lines.
+    """
+    sample = upload.read(4096)
+    upload.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample.decode('utf-8-sig', errors='ignore'), delimiters=',;\t|')
+    except csv.Error:
+        dialect = csv.excel
+
+    text = io.TextIOWrapper(upload, encoding='utf-8-sig', errors='strict', newline='')
+    lines, skipped = [], []
+    part_column, quantity_column = 0, 1
+    header = True
+    try:
+        for number, row in enumerate(csv.reader(text, dialect), start=1):
+            if not any(cell.strip() for cell in row):
+                continue
+            if header:
+                header = False
+                columns = _columns(row)
+                if columns is not None:
+                    part_column, quantity_column = columns
+                    continue
+            part_number = row[part_column].strip() if part_column < len(row) else ''
+            if not normalize_part_number(part_number):
+                skipped.append({'line': number, 'error': "No part number"})
+                continue
+            quantity = _quantity(row[quantity_column] if quantity_column is not None and quantity_column < len(row) else '')
+            if quantity is None:
+                skipped.append({'line': number, 'part_number': part_number, 'error': "Invalid quantity"})
+                continue
+            if len(lines) >= settings.BOM_MAX_LINES:
+                raise BOMError(f"A BOM can have at most {settings.BOM_MAX_LINES} lines")
+            lines.append({'line': number, 'part_number': part_number, 'quantity': quantity})
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise BOMError(f"Could not read the file as CSV: {e}")
+    finally:
+        # Leave the upload open for Django to clean up
+        text.detach()
+    return lines, skipped
+
+
+def _candidates(part_number, local):
+    if local:
+        try:
+            return search.search(part_number)['items']
+        finally:
+            # Pool threads get their own connection; don't leave it open
+            connection.close()
+    return catalog.fetch_json('/items', {'part_number': part_number, 'page': 1}).get('items', [])
+
+
+def resolve_part_number(part_number, local=False):
+    """
+    Looks up one part number, in the local search index if ``local`` is
+    set and through the API otherwise.
+
+    Returns:
+        tuple: The status and the matching catalog items (the candidates
+        for an ambiguous part number).
+    """
+    clean = normalize_part_number(part_number)
+    try:
+        candidates = _candidates(part_number, local)
+    except requests.RequestException:
+        return UNAVAILABLE, []
+    exact = [item for item in candidates if normalize_part_number(item.get('PartNumber')) == clean]
+    if len(exact) == 1:
+        return MATCHED, exact
+    if exact:
+        return AMBIGUOUS, exact[:settings.BOM_MAX_CANDIDATES]
+    if candidates:
+        return AMBIGUOUS, candidates[:settings.BOM_MAX_CANDIDATES]
+    return UNMATCHED, []
+
+
+def _summary(item):
+    manufacturer = item.get('Manufacturer') or {}
+    return {
+        'item_id': item.get('ItemID'),
+        'part_number': item.get('PartNumber'),
+        'description': item.get('Description'),
+        'manufacturer': manufacturer.get('Manufacturer'),
+    }
+
+
+def resolve_bom(lines):
+    """
+    Resolves BOM lines against the catalog.  Lines with the same normalized
+    part number are merged and their quantities added up.
+
+    Returns:
+        dict: Lists of ``matched``, ``ambiguous``, ``unmatched`` and
+        ``unavailable`` lines.
+    """
+    merged = {}
+    for line in lines:
+        clean = normalize_part_number(line['part_number'])
+        if clean in merged:
+            merged[clean]['quantity'] += line['quantity']
+            merged[clean]['lines'].append(line['line'])
+        else:
+            merged[clean] = {'part_number': line['part_number'], 'quantity': line['quantity'], 'lines': [line['line']]}
+
+    result = {MATCHED: [], AMBIGUOUS: [], UNMATCHED: [], UNAVAILABLE: []}
+    if not merged:
+        return result
+    local = search.is_available()
+    workers = min(len(merged), settings.BOM_RESOLVE_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bom-resolve') as executor:
+        resolved = executor.map(
+            lambda part_number: resolve_part_number(part_number, local),
+            [line['part_number'] for line in merged.values()],
+        )
+        for line, (status, items) in zip(merged.values(), resolved):
+            if status == MATCHED:
+                line['item'] = _summary(items[0])
+            elif status == AMBIGUOUS:
+                line['candidates'] = [_summary(item) for item in items]
+            result[status].append(line)
+    return result
@@ -0,0 +1,117 @@
+# industrialpartner/breaker.py
+"""
+Circuit breakers for the catalog API, one per endpoint family.
+
+Each breaker looks at the outcome of the last ``CATALOG_BREAKER_WINDOW`` calls
+of its family.  Errors, 5xx answers and calls slower than
+``CATALOG_BREAKER_SLOW_CALL`` seconds count as failures; once at least
+``CATALOG_BREAKER_MIN_CALLS`` calls were seen and the failure rate reaches
+``CATALOG_BREAKER_FAILURE_RATE`` the circuit opens and calls fail fast
+without touching the network.  After ``CATALOG_BREAKER_RESET_TIMEOUT``
+seconds a single probe call is let through (half-open): if it succeeds the
+circuit closes again, otherwise it stays open for another timeout.
+
+Breakers are kept per worker process.
+"""
+
+import threading
+import time
+from collections import deque
+
+import httpx
+import requests
+from django.conf import settings
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    Raised by the catalog client instead of calling an endpoint family whose
+    circuit is open.
+    """
+
+
+class AsyncCircuitOpenError(httpx.TransportError):
+    """
+    Async counterpart of ``CircuitOpenError`` for the httpx client.
+    """
+
+
+class CircuitBreaker:
+    def __init__(self, family):
+        self.family = family
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes = deque(maxlen=settings.CATALOG_BREAKER_WINDOW)
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Returns whether a call may go out now.  In the half-open state only
+        one probe call is allowed at a time.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < settings.CATALOG_BREAKER_RESET_TIMEOUT:
+                    return False
+                self.state = HALF_OPEN
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record(self, ok, duration):
+        """
+        Records the outcome of a call that ``allow`` let through.
+        """
+        failed = not ok or duration > settings.CATALOG_BREAKER_SLOW_CALL
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                return
+            self._outcomes.append(failed)
+            if (
+                self.state == CLOSED
+                and len(self._outcomes) >= settings.CATALOG_BREAKER_MIN_CALLS
+                and sum(self._outcomes) / len(self._outcomes) >= settings.CATALOG_BREAKER_FAILURE_RATE
+            ):
+                self._open()
+
+    def cancel(self):
+        """
+        Forgets a call that ``allow`` let through but that was cancelled
+        before it finished.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+
+    @property
+    def is_closed(self):
+        return self.state == CLOSED
+
+
+def get_breaker(family):
+    breaker = _breakers.get(family)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(family, CircuitBreaker(family))
+    return breaker
@@ -0,0 +1,236 @@
+# industrialpartner/cache_backends.py
+"""
+Cache backend shared by every worker process on a host.
+
+Entries live in a single SQLite file in WAL mode, so gunicorn workers see the
+same page and catalog data cache and a restart does not start cold.  Every
+write runs in its own transaction, and the cache is bounded both by entry
+count (``MAX_ENTRIES``) and by total pickled size (``MAX_SIZE``), evicting
+least recently used entries first.  Reads never write: a hit only notes the
+access in memory, and the noted accesses are written by the next write of
+the same process, inside the transaction it holds anyway.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'industrialpartner.cache_backends.SQLiteCache',
+            'LOCATION': '/app/cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 50000, 'MAX_SIZE': 512 * 1024 * 1024},
+        }
+    }
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entry (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_entry_accessed ON cache_entry (accessed);
+CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires);
+CREATE TABLE IF NOT EXISTS cache_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_stats (id, entries, bytes) VALUES (1, 0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_entry_insert AFTER INSERT ON cache_entry BEGIN
+    UPDATE cache_stats SET entries = entries + 1, bytes = bytes + new.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entry_update AFTER UPDATE OF size ON cache_entry BEGIN
+    UPDATE cache_stats SET bytes = bytes + new.size - old.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entry_delete AFTER DELETE ON cache_entry BEGIN
+    UPDATE cache_stats SET entries = entries - 1, bytes = bytes - old.size WHERE id = 1;
+END;
+"""
+
+UPSERT = """
+INSERT INTO cache_entry (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value, expires = excluded.expires,
+    accessed = excluded.accessed, size = excluded.size
+"""
+
+
+class SQLiteCache(BaseCache):
+    # Reads only bump an entry's LRU timestamp when it is older than this many
+    # seconds, so a hot key is not queued on every hit
+    access_resolution = 60
+    # Queued bumps kept per process before new ones are dropped (a read-only
+    # stretch must not grow the queue without bound)
+    max_pending_accesses = 10000
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = str(location)
+        self._max_size = options.get('MAX_SIZE')
+        self._busy_timeout = options.get('BUSY_TIMEOUT', 5)
+        self._local = threading.local()
+        self._accesses = {}
+        self._accesses_lock = threading.Lock()
+        self._accesses_pid = os.getpid()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=self._busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _write(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _row(self, conn, key, now):
+        row = conn.execute(
+            'SELECT value, expires, accessed FROM cache_entry WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        return row
+
+    def _note_access(self, key, now):
+        with self._accesses_lock:
+            if self._accesses_pid != os.getpid():
+                # Forked worker: the parent's queue is the parent's to write
+                self._accesses.clear()
+                self._accesses_pid = os.getpid()
+            if key in self._accesses or len(self._accesses) < self.max_pending_accesses:
+                self._accesses[key] = now
+
+    def _flush_accesses(self, conn):
+        # Runs inside a write transaction, so it never waits for the lock
+        with self._accesses_lock:
+            if self._accesses_pid != os.getpid() or not self._accesses:
+                return
+            accesses, self._accesses = self._accesses, {}
+        conn.executemany(
+            'UPDATE cache_entry SET accessed = ? WHERE key = ? AND accessed < ?',
+            ((accessed, key, accessed) for key, accessed in accesses.items()),
+        )
+
+    def _set(self, conn, key, value, timeout, now):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = self.get_backend_timeout(timeout)
+        conn.execute(UPSERT, (key, data, expires, now, len(data)))
+        # Before culling, so the LRU order reflects the queued hits
+        self._flush_accesses(conn)
+        self._cull(conn, now)
+
+    def _cull(self, conn, now):
+        entries, size = conn.execute('SELECT entries, bytes FROM cache_stats WHERE id = 1').fetchone()
+        over_entries = entries > self._max_entries
+        over_size = self._max_size is not None and size > self._max_size
+        if not (over_entries or over_size):
+            return
+        conn.execute('DELETE FROM cache_entry WHERE expires IS NOT NULL AND expires <= ?', (now,))
+        entries, size = conn.execute('SELECT entries, bytes FROM cache_stats WHERE id = 1').fetchone()
+        if self._cull_frequency == 0:
+            if entries > self._max_entries or (self._max_size is not None and size > self._max_size):
+                conn.execute('DELETE FROM cache_entry')
+            return
+        # Drop the least recently used 1/CULL_FREQUENCY of entries until both
+        # limits hold again
+        while entries > self._max_entries or (self._max_size is not None and size > self._max_size):
+            batch = max(entries // self._cull_frequency, 1)
+            conn.execute(
+                'DELETE FROM cache_entry WHERE key IN '
+                '(SELECT key FROM cache_entry ORDER BY accessed LIMIT ?)',
+                (batch,),
+            )
+            entries, size = conn.execute('SELECT entries, bytes FROM cache_stats WHERE id = 1').fetchone()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as conn:
+            if self._row(conn, key, now) is not None:
+                return False
+            self._set(conn, key, value, timeout, now)
+            return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        conn = self._connection()
+        row = self._row(conn, key, now)
+        if row is None:
+            return default
+        if now - row[2] > self.access_resolution:
+            self._note_access(key, now)
+        return pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as conn:
+            self._set(conn, key, value, timeout, time.time())
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as conn:
+            cursor = conn.execute(
+                'UPDATE cache_entry SET expires = ?, accessed = ? '
+                'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), now, key, now),
+            )
+            return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as conn:
+            cursor = conn.execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+            return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._row(self._connection(), key, time.time()) is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as conn:
+            row = self._row(conn, key, now)
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            conn.execute(
+                'UPDATE cache_entry SET value = ?, size = ?, accessed = ? WHERE key = ?',
+                (data, len(data), now, key),
+            )
+            return value
+
+    def clear(self):
+        with self._write() as conn:
+            conn.execute('DELETE FROM cache_entry')
+
+    def close(self, **kwargs):
+        # Connections are kept open per thread and reused across requests
+        pass
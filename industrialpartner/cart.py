@@ -0,0 +1,153 @@
+# industrialpartner/cart.py
+"""
+The visitor's cart.
+
+The session only holds a compact ``{item_id: quantity}`` map with string keys
+(the session serializer turns keys into strings anyway, so int keys would
+duplicate lines after a round trip).  Part numbers and descriptions are not
+stored; ``Cart.lines`` looks them up for all lines in one batched catalog
+call when the cart is displayed, so adding an item never touches the API.
+"""
+
+from django.conf import settings
+
+from . import catalog
+
+SESSION_KEY = 'cart'
+
+# Operations accepted by Cart.apply
+ADD = 'add'
+SET = 'set'
+REMOVE = 'remove'
+OPERATIONS = (ADD, SET, REMOVE)
+
+
+def _quantity(value):
+    # Carts stored before the compact format held a dict per line
+    if isinstance(value, dict):
+        value = value.get('quantity')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class Cart:
+    def __init__(self, session):
+        self.session = session
+        self.items = {}
+        for item_id, value in (session.get(SESSION_KEY) or {}).items():
+            quantity = _quantity(value)
+            if quantity > 0:
+                self._set(str(item_id), self.items.get(str(item_id), 0) + quantity)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _set(self, item_id, quantity):
+        self.items[item_id] = min(quantity, settings.CART_MAX_QUANTITY)
+
+    def _add(self, item_id, quantity):
+        if item_id not in self.items and len(self.items) >= settings.CART_MAX_LINES:
+            return False
+        self._set(item_id, self.items.get(item_id, 0) + quantity)
+        return True
+
+    def _put(self, item_id, quantity):
+        if quantity <= 0:
+            self.items.pop(item_id, None)
+            return True
+        if item_id not in self.items and len(self.items) >= settings.CART_MAX_LINES:
+            return False
+        self._set(item_id, quantity)
+        return True
+
+    def add(self, item_id, quantity=1):
+        """
+        Adds ``quantity`` of an item.
+
+        Returns:
+            bool: False if the item is new and the cart already has
+            ``settings.CART_MAX_LINES`` lines.
+        """
+        added = self._add(str(item_id), quantity)
+        self.save()
+        return added
+
+    def set(self, item_id, quantity):
+        """
+        Sets the quantity of an item; zero removes it.  Returns False like
+        ``add`` when the cart is full.
+        """
+        applied = self._put(str(item_id), quantity)
+        self.save()
+        return applied
+
+    def remove(self, item_id):
+        self.items.pop(str(item_id), None)
+        self.save()
+
+    def apply(self, operations):
+        """
+        Applies ``(op, item_id, quantity)`` operations in order and saves the
+        session once.
+
+        Returns:
+            list: Indexes of the operations that were not applied because the
+            cart was full.
+        """
+        rejected = []
+        for index, (op, item_id, quantity) in enumerate(operations):
+            item_id = str(item_id)
+            if op == ADD:
+                applied = self._add(item_id, quantity)
+            else:
+                applied = self._put(item_id, 0 if op == REMOVE else quantity)
+            if not applied:
+                rejected.append(index)
+        self.save()
+        return rejected
+
+    def clear(self):
+        self.items = {}
+        self.save()
+
+    def count(self):
+        return sum(self.items.values())
+
+    def save(self):
+        # Assigning marks the session modified; skip it when nothing changed
+        # so the session row is not rewritten
+        if self.session.get(SESSION_KEY) != self.items:
+            self.session[SESSION_KEY] = dict(self.items)
+
+    def lines(self):
+        """
+        Returns the cart lines with their catalog details, fetched in one
+        batch (cached entries first, misses concurrently).
+
+        Returns:
+            dict: Item ID to a dict with PartNumber, Description and quantity.
+        """
+        paths = {item_id: f"/items/{item_id}" for item_id in self.items}
+        details = catalog.get_json_many(paths.values())
+        lines = {}
+        for item_id, quantity in self.items.items():
+            item = details.get(paths[item_id]) or {}
+            lines[item_id] = {
+                'PartNumber': item.get('PartNumber', 'N/A'),
+                'Description': item.get('Description', 'N/A'),
+                'quantity': quantity,
+            }
+        return lines
+
+
+def known_items(item_ids):
+    """
+    Returns the subset of ``item_ids`` the catalog knows, checked in one
+    batched lookup.  Items that cannot be looked up right now (API down and
+    nothing cached) count as unknown.
+    """
+    paths = {str(item_id): f"/items/{item_id}" for item_id in item_ids}
+    details = catalog.get_json_many(paths.values())
+    return {item_id for item_id, path in paths.items() if details.get(path)}
@@ -0,0 +1,489 @@
+# industrialpartner/catalog.py
+"""
+Shared client for the upstream catalog API.
+
+Every view talks to the catalog through this module so that connections are
+pooled and kept alive per worker process, responses are gzip-negotiated and
+every call carries a connect/read timeout.  The base URL lives in
+``settings.CATALOG_API_URL``.
+
+GET responses are kept in a read-through data cache keyed by path and query
+parameters, with a TTL per endpoint family (``settings.CATALOG_CACHE_TTLS``).
+Once an entry goes stale it is still served while a background refresh
+fetches the new copy, so a hot item costs one upstream call per TTL window
+no matter how many views or visitors ask for it.
+
+With ``settings.CATALOG_MIRROR_READS`` enabled, reads are answered from the
+local catalog mirror (``industrialpartner.mirror``) whenever it can.
+
+Concurrent misses for the same entry are coalesced into one upstream call,
+within a worker (``industrialpartner.singleflight``) and across workers
+through a fill lock in the shared cache.
+
+Slow GETs can be hedged with a second attempt (``industrialpartner.hedging``).
+
+Calls go through a circuit breaker per endpoint family
+(``industrialpartner.breaker``).  While a circuit is open, calls fail fast
+and reads are answered from stale cache entries or the mirror; such requests
+are flagged (``served_stale``) so the page can say so and is not cached.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.cache import caches
+
+from . import hedging, mirror, singleflight
+from .breaker import AsyncCircuitOpenError, CircuitOpenError, get_breaker
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+# One async client per event loop; an httpx client cannot be shared across loops
+_async_clients = weakref.WeakKeyDictionary()
+
+# Background refreshes of stale cache entries, keyed by cache key
+_refresh_executor = None
+_refresh_pid = None
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+# Set while handling a request that was answered with stale or mirrored data
+# because the API is failing; see served_stale()
+_served_stale = contextvars.ContextVar('catalog_served_stale', default=False)
+
+DEFAULT_HEADERS = {
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=settings.CATALOG_API_POOL_SIZE,
+        pool_maxsize=settings.CATALOG_API_POOL_SIZE,
+        max_retries=0,
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_session():
+    """
+    Returns the keep-alive session of the current worker process.
+
+    The session is rebuilt after a fork so gunicorn workers never share
+    sockets inherited from the master process.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def api_url(path):
+    """
+    Builds an absolute catalog URL from a path such as ``/items/42``.
+    """
+    return f"{settings.CATALOG_API_URL.rstrip('/')}/{path.lstrip('/')}"
+
+
+def request(method, path, **kwargs):
+    """
+    Sends a request to the catalog API through the pooled session.
+
+    Args:
+        method (str): HTTP method.
+        path (str): Path relative to ``CATALOG_API_URL``.
+        **kwargs: Passed through to ``requests.Session.request``.
+
+    Returns:
+        requests.Response: The raw response.
+    """
+    breaker = get_breaker(endpoint_family(path))
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit for catalog {breaker.family!r} calls is open")
+    kwargs.setdefault('timeout', settings.CATALOG_API_TIMEOUT)
+    start = time.monotonic()
+    try:
+        response = get_session().request(method, api_url(path), **kwargs)
+    except Exception:
+        breaker.record(False, time.monotonic() - start)
+        raise
+    breaker.record(response.status_code < 500, time.monotonic() - start)
+    return response
+
+
+def get(path, params=None, **kwargs):
+    return request('GET', path, params=params, **kwargs)
+
+
+def post(path, json=None, **kwargs):
+    return request('POST', path, json=json, **kwargs)
+
+
+def endpoint_family(path):
+    """
+    Groups a catalog path into its endpoint family, e.g. ``/items/42`` is
+    ``item``, ``/items`` is ``items`` and ``/manufacturer`` is ``manufacturer``.
+    """
+    parts = [part for part in path.split('/') if part]
+    if not parts:
+        return ''
+    if parts[0] == 'items' and len(parts) > 1:
+        return 'item'
+    return parts[0]
+
+
+def cache_key(path, params=None):
+    query = urlencode(sorted((key, str(value)) for key, value in (params or {}).items()))
+    digest = hashlib.sha1(f"{path}?{query}".encode()).hexdigest()
+    return f"catalog:{digest}"
+
+
+def data_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def _store(key, data, ttl):
+    # Entries outlive their TTL by CATALOG_CACHE_STALE_TTL so they can be
+    # served stale while a refresh is running
+    data_cache().set(key, (time.time() + ttl, data), ttl + settings.CATALOG_CACHE_STALE_TTL)
+
+
+def _get_json(path, params=None):
+    def attempt():
+        response = get(path, params)
+        response.raise_for_status()
+        return response.json()
+    return hedging.call(endpoint_family(path), attempt)
+
+
+def _fill_lock(key):
+    return f"{key}:fill"
+
+
+def _wait_for_fill(key):
+    # Another worker holds the fill lock: wait for its cache entry, or until
+    # it gives up and releases the lock
+    cache = data_cache()
+    deadline = time.monotonic() + settings.CATALOG_FILL_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(settings.CATALOG_FILL_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+        if not cache.has_key(_fill_lock(key)):
+            return None
+    return None
+
+
+def _fill(key, path, params, ttl):
+    # Fetches a missing entry.  Only one worker process fetches a given key
+    # at a time; the others wait for it and read its result from the cache.
+    cache = data_cache()
+    locked = cache.add(_fill_lock(key), os.getpid(), settings.CATALOG_FILL_LOCK_TIMEOUT)
+    if not locked:
+        entry = _wait_for_fill(key)
+        if entry is not None:
+            return entry[1]
+    try:
+        data = _get_json(path, params)
+        _store(key, data, ttl)
+        return data
+    finally:
+        if locked:
+            cache.delete(_fill_lock(key))
+
+
+async def _await_fill(key):
+    cache = data_cache()
+    deadline = time.monotonic() + settings.CATALOG_FILL_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(settings.CATALOG_FILL_POLL)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry
+        if not await cache.ahas_key(_fill_lock(key)):
+            return None
+    return None
+
+
+async def _afill(key, path, params, ttl):
+    cache = data_cache()
+    locked = await cache.aadd(_fill_lock(key), os.getpid(), settings.CATALOG_FILL_LOCK_TIMEOUT)
+    if not locked:
+        entry = await _await_fill(key)
+        if entry is not None:
+            return entry[1]
+    try:
+        data = await _aget_json(path, params)
+        await cache.aset(key, (time.time() + ttl, data), ttl + settings.CATALOG_CACHE_STALE_TTL)
+        return data
+    finally:
+        if locked:
+            await cache.adelete(_fill_lock(key))
+
+
+def _refresh(key, path, params, ttl):
+    cache = data_cache()
+    # A worker that finds the lock taken leaves the refresh to its holder
+    locked = cache.add(_fill_lock(key), os.getpid(), settings.CATALOG_FILL_LOCK_TIMEOUT)
+    try:
+        if locked:
+            _store(key, _get_json(path, params), ttl)
+    except requests.RequestException:
+        pass
+    finally:
+        if locked:
+            cache.delete(_fill_lock(key))
+        with _refresh_lock:
+            _refreshing.discard(key)
+
+
+def _schedule_refresh(key, path, params, ttl):
+    global _refresh_executor, _refresh_pid
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        pid = os.getpid()
+        if _refresh_executor is None or _refresh_pid != pid:
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=settings.CATALOG_CACHE_REFRESH_WORKERS,
+                thread_name_prefix='catalog-refresh',
+            )
+            _refresh_pid = pid
+            _refreshing.clear()
+        _refreshing.add(key)
+    _refresh_executor.submit(_refresh, key, path, params, ttl)
+
+
+def served_stale():
+    """
+    Returns whether the current request was answered with fallback data
+    because the catalog API is failing.
+    """
+    return _served_stale.get()
+
+
+def reset_served_stale():
+    _served_stale.set(False)
+
+
+def _cached_entry(entry, key, path, params, ttl):
+    fresh_until, data = entry
+    if time.time() >= fresh_until:
+        if not get_breaker(endpoint_family(path)).is_closed:
+            _served_stale.set(True)
+        _schedule_refresh(key, path, params, ttl)
+    return data
+
+
+def _fallback(path, params):
+    # Last known good copy from the catalog mirror, when it has one
+    data = mirror.get(path, params)
+    if data is not None:
+        _served_stale.set(True)
+    return data
+
+
+def fetch_json(path, params=None):
+    """
+    GETs a catalog path through the data cache and decodes the JSON body.
+
+    Raises:
+        requests.RequestException: If the upstream call fails on a cache miss.
+    """
+    if settings.CATALOG_MIRROR_READS:
+        data = mirror.get(path, params)
+        if data is not None:
+            return data
+
+    ttl = settings.CATALOG_CACHE_TTLS.get(endpoint_family(path))
+    if not ttl:
+        return _get_json(path, params)
+
+    key = cache_key(path, params)
+    entry = data_cache().get(key)
+    if entry is not None:
+        return _cached_entry(entry, key, path, params, ttl)
+
+    try:
+        return singleflight.do(key, lambda: _fill(key, path, params, ttl))
+    except requests.RequestException:
+        data = None if settings.CATALOG_MIRROR_READS else _fallback(path, params)
+        if data is None:
+            raise
+        return data
+
+
+def get_json(path, params=None):
+    """
+    Like ``fetch_json``, but returns None instead of raising when the
+    request fails or does not return 200.
+    """
+    try:
+        return fetch_json(path, params)
+    except requests.RequestException:
+        return None
+
+
+def _get_json_marked(path):
+    # Runs on a pool thread, whose context is not the request's; the stale
+    # flag is handed back so the caller can carry it over
+    reset_served_stale()
+    return get_json(path), served_stale()
+
+
+def get_json_many(paths):
+    """
+    Looks up several catalog paths at once: cached entries are read in one
+    cache round trip and the misses are fetched concurrently.
+
+    Returns:
+        dict: The decoded JSON per path, or None for paths whose request
+        failed or did not return 200.
+    """
+    paths = list(dict.fromkeys(paths))
+    results = {}
+    if not settings.CATALOG_MIRROR_READS:
+        ttls = {path: settings.CATALOG_CACHE_TTLS.get(endpoint_family(path)) for path in paths}
+        keys = {cache_key(path): path for path in paths if ttls[path]}
+        for key, entry in data_cache().get_many(keys).items():
+            path = keys[key]
+            results[path] = _cached_entry(entry, key, path, None, ttls[path])
+
+    missing = [path for path in paths if path not in results]
+    if len(missing) == 1:
+        results[missing[0]] = get_json(missing[0])
+    elif missing:
+        workers = min(len(missing), settings.CATALOG_BATCH_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='catalog-batch') as executor:
+            for path, (data, stale) in zip(missing, executor.map(_get_json_marked, missing)):
+                results[path] = data
+                if stale:
+                    _served_stale.set(True)
+    return results
+
+
+def get_async_client():
+    """
+    Returns the keep-alive httpx client bound to the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        connect_timeout, read_timeout = settings.CATALOG_API_TIMEOUT
+        client = httpx.AsyncClient(
+            base_url=settings.CATALOG_API_URL,
+            headers=DEFAULT_HEADERS,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.CATALOG_API_POOL_SIZE,
+                max_keepalive_connections=settings.CATALOG_API_POOL_SIZE,
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def arequest(method, path, **kwargs):
+    """
+    Async counterpart of ``request``; returns an ``httpx.Response``.
+    """
+    breaker = get_breaker(endpoint_family(path))
+    if not breaker.allow():
+        raise AsyncCircuitOpenError(f"Circuit for catalog {breaker.family!r} calls is open")
+    start = time.monotonic()
+    try:
+        response = await get_async_client().request(method, '/' + path.lstrip('/'), **kwargs)
+    except asyncio.CancelledError:
+        # A hedged attempt that lost the race says nothing about the upstream
+        breaker.cancel()
+        raise
+    except Exception:
+        breaker.record(False, time.monotonic() - start)
+        raise
+    breaker.record(response.status_code < 500, time.monotonic() - start)
+    return response
+
+
+async def aget(path, params=None, **kwargs):
+    return await arequest('GET', path, params=params, **kwargs)
+
+
+async def _aget_json(path, params=None):
+    async def attempt():
+        response = await aget(path, params)
+        response.raise_for_status()
+        return response.json()
+    return await hedging.acall(endpoint_family(path), attempt)
+
+
+async def afetch_json(path, params=None):
+    """
+    Async counterpart of ``fetch_json``; raises ``httpx.HTTPError``.
+    """
+    if settings.CATALOG_MIRROR_READS:
+        data = await sync_to_async(mirror.get)(path, params)
+        if data is not None:
+            return data
+
+    ttl = settings.CATALOG_CACHE_TTLS.get(endpoint_family(path))
+    if not ttl:
+        return await _aget_json(path, params)
+
+    key = cache_key(path, params)
+    entry = await data_cache().aget(key)
+    if entry is not None:
+        return _cached_entry(entry, key, path, params, ttl)
+
+    try:
+        return await singleflight.ado(key, lambda: _afill(key, path, params, ttl))
+    except httpx.HTTPError:
+        data = None if settings.CATALOG_MIRROR_READS else await sync_to_async(_fallback)(path, params)
+        if data is None:
+            raise
+        return data
+
+
+async def aget_json(path, params=None):
+    """
+    Async counterpart of ``get_json``.
+    """
+    try:
+        return await afetch_json(path, params)
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+def error_status(exc, default=502):
+    """
+    Returns the upstream status code carried by a requests or httpx error,
+    falling back to ``default`` for connection errors and timeouts.
+    """
+    if isinstance(exc, (CircuitOpenError, AsyncCircuitOpenError)):
+        return 503
+    response = getattr(exc, 'response', None)
+    return response.status_code if response is not None else default
@@ -1,8 +1,15 @@
 # industrialpartner/context_processors.py
 
-from .utils import calculate_cart_count
+from django.conf import settings
 
-def cart_count(request):
-    cart = request.session.get('cart', {})
-    cart_count = calculate_cart_count(cart)
-    return {'cart_count': cart_count}
+from . import catalog, fragments
+
+def catalog_status(request):
+    # Not per-visitor: pages flagged stale are never stored in the page cache
+    return {'catalog_stale': catalog.served_stale()}
+
+def fragment_cache(request):
+    return {
+        'fragment_version': fragments.version(),
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
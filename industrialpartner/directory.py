@@ -0,0 +1,86 @@
+# industrialpartner/directory.py
+"""
+A–Z manufacturer directory for the sitemap page.
+
+``get_directory`` pulls every ``/manufacturer`` page concurrently, merges and
+sorts the manufacturers and groups them under the letters of the home page
+filter.  The grouped result is kept in the catalog data cache, so a visitor
+costs one cache lookup instead of one upstream request per listing page.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+
+from . import catalog
+
+# Same buckets as the A–Z filter on the home page; names starting with
+# anything else (0, punctuation, ...) go under '#'
+LETTERS = "#123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+CACHE_KEY = 'catalog:manufacturer-directory'
+
+
+def letter_for(name):
+    first = (name or '').strip()[:1].upper()
+    return first if first and first in LETTERS[1:] else '#'
+
+
+def _page(page):
+    return catalog.fetch_json('/manufacturer', {'brand_name': '', 'page': page})
+
+
+def build_directory():
+    """
+    Fetches all manufacturer pages and groups them by letter.
+
+    Raises:
+        requests.RequestException: If any page cannot be fetched; a partial
+            directory is never returned.
+    """
+    first = _page(1)
+    pages = first.get('pages') or 1
+    results = [first]
+    if pages > 1:
+        with ThreadPoolExecutor(max_workers=settings.MANUFACTURER_DIRECTORY_WORKERS) as pool:
+            results.extend(pool.map(_page, range(2, pages + 1)))
+
+    manufacturers = {}
+    for data in results:
+        for manufacturer in data.get('items', []):
+            manufacturers[manufacturer['ManufacturerID']] = {
+                'ManufacturerID': manufacturer['ManufacturerID'],
+                'Manufacturer': manufacturer.get('Manufacturer') or '',
+                'Lookup': manufacturer.get('Lookup') or '',
+            }
+
+    letters = {letter: [] for letter in LETTERS}
+    for manufacturer in sorted(manufacturers.values(), key=lambda m: (m['Manufacturer'].casefold(), m['ManufacturerID'])):
+        letters[letter_for(manufacturer['Manufacturer'])].append(manufacturer)
+    return {
+        'total': len(manufacturers),
+        'letters': {letter: entries for letter, entries in letters.items() if entries},
+    }
+
+
+def get_directory():
+    """
+    Returns the cached directory, rebuilding it once it is older than
+    ``settings.MANUFACTURER_DIRECTORY_TTL``.  If a rebuild fails the previous
+    directory keeps being served.
+    """
+    cache = catalog.data_cache()
+    entry = cache.get(CACHE_KEY)
+    if entry is not None and time.time() < entry[0]:
+        return entry[1]
+    try:
+        directory = build_directory()
+    except requests.RequestException:
+        if entry is None:
+            raise
+        return entry[1]
+    ttl = settings.MANUFACTURER_DIRECTORY_TTL
+    cache.set(CACHE_KEY, (time.time() + ttl, directory), ttl + settings.CATALOG_CACHE_STALE_TTL)
+    return directory
@@ -0,0 +1,47 @@
+# industrialpartner/featured.py
+"""
+Products for the homepage strip.
+
+``featured_products`` returns at most ``settings.FEATURED_PRODUCTS_LIMIT``
+products, featured ones first and then the newest, with only the columns
+the strip shows (the description shortened to ``FEATURED_SUMMARY_LENGTH``
+characters as ``summary``).  The query walks ``product_featured_idx`` and
+stops after the limit, so its cost does not grow with the table, and the
+result is cached until a Product is saved or deleted (see
+``industrialpartner.signals``).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import Substr
+from django.utils.text import Truncator
+
+from .models import Product
+
+CACHE_KEY = 'products:featured'
+
+
+def _query():
+    length = settings.FEATURED_SUMMARY_LENGTH
+    products = list(
+        Product.objects
+        .only('id', 'PartNumber', 'image1', 'image_derivatives')
+        # One character more than shown, so Truncator knows to add the ellipsis
+        .annotate(summary=Substr('Description', 1, length + 1))
+        .order_by('-featured', 'featured_order', '-created_at')[:settings.FEATURED_PRODUCTS_LIMIT]
+    )
+    for product in products:
+        product.summary = Truncator(product.summary).chars(length)
+    return products
+
+
+def featured_products():
+    products = cache.get(CACHE_KEY)
+    if products is None:
+        products = _query()
+        cache.set(CACHE_KEY, products, settings.FEATURED_PRODUCTS_TTL)
+    return products
+
+
+def invalidate():
+    cache.delete(CACHE_KEY)
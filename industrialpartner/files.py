@@ -0,0 +1,184 @@
+# industrialpartner/files.py
+"""
+Serving files straight from disk.
+
+``serve`` answers a request for one file with the headers a CDN or browser
+needs to avoid downloading it again: a strong ETag and Last-Modified for
+conditional GETs, the Cache-Control the caller picks, and ``Accept-Ranges``.
+It sends the precompressed ``.gz`` copy next to the file when the client
+accepts gzip, answers single byte ranges with 206, and hands the open file
+to the server through ``FileResponse`` so gunicorn can ``sendfile`` it
+instead of copying it through Python.
+"""
+
+import mimetypes
+import os
+import re
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+BLOCK_SIZE = 64 * 1024
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """
+    Read-only view of ``length`` bytes of an open file starting at ``start``.
+
+    It keeps ``fileno``, and the file positioned at ``start``, so gunicorn's
+    sendfile path sends the range (it sends Content-Length bytes from the
+    current offset) and other servers get it through ``read``.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def resolve(root, path):
+    """
+    Returns the absolute path of ``path`` inside ``root`` if it names a
+    regular file there, and None otherwise (including paths escaping root).
+    """
+    if not root:
+        return None
+    try:
+        full_path = safe_join(root, path)
+    except (SuspiciousFileOperation, ValueError):
+        return None
+    return full_path if os.path.isfile(full_path) else None
+
+
+def etag_for(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def accepts_gzip(request):
+    return 'gzip' in request.headers.get('Accept-Encoding', '')
+
+
+def parse_range(header, size):
+    """
+    Parses a single ``bytes=`` range.
+
+    Returns:
+        tuple: Inclusive (first, last) byte positions, or None when the
+        header should be ignored (malformed or several ranges).
+
+    Raises:
+        ValueError: If the range cannot be satisfied.
+    """
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise ValueError(header)
+    return first, last
+
+
+def serve(request, path, max_age, immutable=False, content_type=None):
+    """
+    Serves the file at ``path``, which must exist.
+
+    Args:
+        max_age (int): Seconds browsers and proxies may keep the file.
+        immutable (bool): Whether the file never changes under this URL
+            (content-hashed names), so browsers need not revalidate it.
+        content_type (str): Overrides the type guessed from the extension.
+    """
+    if content_type is None:
+        content_type, encoding = mimetypes.guess_type(path)
+        if encoding:
+            # e.g. a .gz or .br file itself, served as-is
+            content_type = 'application/octet-stream'
+        content_type = content_type or 'application/octet-stream'
+
+    compressed = path + '.gz'
+    has_compressed = os.path.isfile(compressed)
+    range_header = request.headers.get('Range')
+    # Ranges refer to the identity encoding, so they are served uncompressed
+    if has_compressed and accepts_gzip(request) and not range_header:
+        served_path, content_encoding = compressed, 'gzip'
+    else:
+        served_path, content_encoding = path, None
+
+    stat = os.stat(served_path)
+    etag = etag_for(stat)
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Accept-Ranges'] = 'bytes'
+        if immutable:
+            patch_cache_control(response, public=True, max_age=max_age, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=max_age)
+        if has_compressed:
+            patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        return finish(not_modified)
+
+    byte_range = None
+    if range_header and request.method in ('GET', 'HEAD'):
+        if_range = request.headers.get('If-Range')
+        if if_range is None or if_range == etag or parse_http_date_safe(if_range) == int(stat.st_mtime):
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+                return finish(response)
+
+    if byte_range is not None:
+        first, last = byte_range
+        length = last - first + 1
+        status = 206
+    else:
+        length = stat.st_size
+        status = 200
+
+    if request.method == 'HEAD':
+        response = HttpResponse(status=status, content_type=content_type)
+    elif byte_range is not None:
+        response = FileResponse(RangeFile(open(served_path, 'rb'), first, length), status=status, content_type=content_type)
+    else:
+        response = FileResponse(open(served_path, 'rb'), status=status, content_type=content_type)
+    if isinstance(response, FileResponse):
+        response.block_size = BLOCK_SIZE
+    response['Content-Length'] = length
+    if byte_range is not None:
+        response['Content-Range'] = f'bytes {first}-{last}/{stat.st_size}'
+    if content_encoding:
+        response['Content-Encoding'] = content_encoding
+    return finish(response)
@@ -0,0 +1,34 @@
+# industrialpartner/fragments.py
+"""
+Version of the cached page chrome.
+
+The base templates wrap the navbar and footer partials in ``{% cache %}``
+blocks stored in the per-worker ``'fragments'`` cache, the navbar varying on
+the manufacturer (it shows a manufacturer badge and links) and the catalog
+link of the base template.  Every key also includes ``version()``, so
+fragments rendered by an older release are never served: it changes with
+``settings.FRAGMENT_CACHE_VERSION`` (set per deploy), with the source of the
+partials and with the collectstatic manifest the ``{% static %}`` links in
+them come from.
+"""
+
+import functools
+import hashlib
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template import loader
+
+# Alias the {% cache %} blocks in the base templates use
+CACHE_ALIAS = 'fragments'
+
+PARTIALS = ['industrialpartner/partials/navbar.html', 'industrialpartner/partials/footer.html']
+
+
+@functools.cache
+def version():
+    digest = hashlib.sha1(settings.FRAGMENT_CACHE_VERSION.encode())
+    for name in PARTIALS:
+        digest.update(loader.get_template(name).template.source.encode())
+    digest.update(getattr(staticfiles_storage, 'manifest_hash', '').encode())
+    return digest.hexdigest()[:12]
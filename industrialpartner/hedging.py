@@ -0,0 +1,258 @@
+# industrialpartner/hedging.py
+"""
+Hedged catalog GETs.
+
+When ``settings.CATALOG_HEDGE`` is on, a GET to one of the
+``CATALOG_HEDGE_FAMILIES`` that has not answered after the family's recent
+``CATALOG_HEDGE_PERCENTILE`` latency is sent a second time, and whichever
+attempt answers first wins, in ``call`` and ``acall`` alike.  The losing
+attempt is cancelled (async) or abandoned and its answer discarded (sync).
+A sync call makes its first attempt on a thread of its own and sends the
+hedge on the ``CATALOG_HEDGE_WORKERS`` pool, so the pool never caps how many
+calls are in flight.  Hedges are paid for from a token bucket that earns
+``CATALOG_HEDGE_BUDGET`` tokens per request, so they add at most that
+fraction of extra upstream load, and no hedge goes out while the family's
+circuit breaker is not closed.
+
+Only idempotent GETs may be hedged.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+from .breaker import get_breaker
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+_stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0}
+_stats_lock = threading.Lock()
+
+
+class LatencyTracker:
+    """
+    Recent successful call latencies of one endpoint family.
+    """
+
+    def __init__(self):
+        self._samples = deque(maxlen=settings.CATALOG_HEDGE_WINDOW)
+        self._lock = threading.Lock()
+        self._delay = None
+        self._since_update = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self._since_update += 1
+            # Re-sorting the window on every call is wasted work; the
+            # percentile only needs to follow the trend
+            if self._since_update >= 10 or self._delay is None:
+                self._update()
+
+    def _update(self):
+        self._since_update = 0
+        if len(self._samples) < settings.CATALOG_HEDGE_MIN_SAMPLES:
+            self._delay = None
+            return
+        ordered = sorted(self._samples)
+        index = min(int(len(ordered) * settings.CATALOG_HEDGE_PERCENTILE / 100), len(ordered) - 1)
+        self._delay = max(ordered[index], settings.CATALOG_HEDGE_MIN_DELAY)
+
+    @property
+    def delay(self):
+        """
+        Seconds to wait before hedging, or None until enough samples exist.
+        """
+        return self._delay
+
+
+class HedgeBudget:
+    """
+    Token bucket that caps hedges to a fraction of all requests.
+    """
+
+    def __init__(self):
+        self._tokens = settings.CATALOG_HEDGE_BURST
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self._tokens = min(self._tokens + settings.CATALOG_HEDGE_BUDGET, settings.CATALOG_HEDGE_BURST)
+
+    def spend(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+_budget = None
+
+
+def _get_budget():
+    global _budget
+    if _budget is None:
+        _budget = HedgeBudget()
+    return _budget
+
+
+def get_tracker(family):
+    tracker = _trackers.get(family)
+    if tracker is None:
+        with _trackers_lock:
+            tracker = _trackers.setdefault(family, LatencyTracker())
+    return tracker
+
+
+def is_hedged(family):
+    return settings.CATALOG_HEDGE and family in settings.CATALOG_HEDGE_FAMILIES
+
+
+def stats():
+    """
+    Returns counts of hedged calls since the worker started.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=settings.CATALOG_HEDGE_WORKERS, thread_name_prefix='catalog-hedge',
+                )
+                _executor_pid = pid
+    return _executor
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _spawn(family, attempt):
+    # Runs the first attempt of a sync call on a thread of its own and
+    # returns its future
+    future = concurrent.futures.Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(_timed(family, attempt))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name='catalog-hedge-primary', daemon=True).start()
+    return future
+
+
+def _timed(family, attempt):
+    start = time.monotonic()
+    result = attempt()
+    get_tracker(family).record(time.monotonic() - start)
+    return result
+
+
+async def _atimed(family, attempt):
+    start = time.monotonic()
+    result = await attempt()
+    get_tracker(family).record(time.monotonic() - start)
+    return result
+
+
+def _start(family):
+    # Returns the hedge delay for this call, or None while the family's
+    # latency is still being learned
+    _count('requests')
+    _get_budget().earn()
+    return get_tracker(family).delay
+
+
+def _may_hedge(family):
+    if not get_breaker(family).is_closed or not _get_budget().spend():
+        return False
+    _count('hedged')
+    return True
+
+
+def call(family, attempt):
+    """
+    Runs ``attempt`` (a function performing one GET) and hedges it with a
+    second call if it is slower than the family's hedge delay; the first
+    successful answer is returned.
+    """
+    if not is_hedged(family):
+        return attempt()
+    delay = _start(family)
+    if delay is None:
+        return _timed(family, attempt)
+
+    primary = _spawn(family, attempt)
+    try:
+        return primary.result(timeout=delay)
+    except concurrent.futures.TimeoutError:
+        pass
+    if not _may_hedge(family):
+        return primary.result()
+
+    hedge = _get_executor().submit(_timed, family, attempt)
+    pending = {primary, hedge}
+    while pending:
+        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    _count('hedge_wins')
+                # The other attempt cannot be interrupted; its answer is dropped
+                return future.result()
+    return primary.result()
+
+
+async def acall(family, attempt):
+    """
+    Async counterpart of ``call``; ``attempt`` is a coroutine function.  The
+    losing attempt is cancelled.
+    """
+    if not is_hedged(family):
+        return await attempt()
+    delay = _start(family)
+    if delay is None:
+        return await _atimed(family, attempt)
+
+    primary = asyncio.ensure_future(_atimed(family, attempt))
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done or not _may_hedge(family):
+            return await primary
+
+        hedge = asyncio.ensure_future(_atimed(family, attempt))
+        tasks.append(hedge)
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        _count('hedge_wins')
+                    return task.result()
+        return primary.result()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
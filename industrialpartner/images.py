@@ -0,0 +1,145 @@
+# industrialpartner/images.py
+"""
+Resized WebP derivatives of uploaded product images.
+
+For an upload stored as ``images/foo.jpg``, ``generate_derivatives`` writes
+``images/derivatives/foo-320w.webp`` and so on for every width in
+``settings.IMAGE_DERIVATIVE_WIDTHS`` that is smaller than the original, plus
+one at the original's own width when it is narrower than the widest
+derivative (an image is never scaled up).  Names only depend on the upload
+name and the width, so templates can point at them without a lookup; the
+``responsive_image`` template tag turns them into ``srcset`` candidates and
+keeps the original as the fallback.
+
+Derivatives are made when a Product is saved with a new image (see
+``industrialpartner.signals``) and in bulk by the build_image_derivatives
+management command.  Both then ``record_derivatives`` on the product: the
+size of each image and the widths that exist go into
+``Product.image_derivatives``, which is all the template tag reads, so
+rendering a page never touches storage.
+"""
+
+import io
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+DIRECTORY = 'derivatives'
+
+
+def derivative_name(name, width):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, DIRECTORY, f"{stem}-{width}w.webp")
+
+
+def derivative_widths(original_width):
+    """
+    Returns the widths derivatives are made in for an image
+    ``original_width`` pixels wide, narrowest first.
+    """
+    widths = sorted(settings.IMAGE_DERIVATIVE_WIDTHS)
+    smaller = [width for width in widths if width < original_width]
+    if original_width <= widths[-1]:
+        smaller.append(original_width)
+    return smaller
+
+
+def available_derivatives(name, original_width, storage=default_storage):
+    """
+    Returns ``(width, name)`` for the derivatives of ``name``, narrowest
+    first, or an empty list if they have not been made yet.
+    """
+    widths = derivative_widths(original_width)
+    # Written narrowest first, so the widest one exists only once all do
+    if not widths or not storage.exists(derivative_name(name, widths[-1])):
+        return []
+    return [(width, derivative_name(name, width)) for width in widths]
+
+
+def _prepare(image):
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('P', 'LA', 'PA'):
+        return image.convert('RGBA')
+    if image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGB')
+    return image
+
+
+def generate_derivatives(name, force=False, storage=default_storage):
+    """
+    Writes the WebP derivatives of one stored image.
+
+    Args:
+        name (str): Storage name of the original, e.g. ``images/foo.jpg``.
+        force (bool): Rewrite derivatives that already exist.
+
+    Returns:
+        list: Names of the derivatives written.
+    """
+    with storage.open(name, 'rb') as f:
+        image = Image.open(f)
+        widths = derivative_widths(image.width)
+        if not force and available_derivatives(name, image.width, storage):
+            return []
+        # Lets the JPEG decoder scale down while decoding, which is much
+        # cheaper than decoding at full size and resizing afterwards
+        image.draft('RGB', (widths[-1], image.height * widths[-1] // image.width))
+        image = _prepare(image)
+        image.load()
+
+    written = []
+    for width in widths:
+        target = derivative_name(name, width)
+        if not force and storage.exists(target):
+            continue
+        # Widths follow the stored width; an EXIF rotation can leave the
+        # upright image narrower than that
+        size = (min(width, image.width), max(round(image.height * min(width, image.width) / image.width), 1))
+        resized = image if size == image.size else image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        buffer = io.BytesIO()
+        resized.save(buffer, 'WEBP', quality=settings.IMAGE_WEBP_QUALITY, method=4)
+        if storage.exists(target):
+            storage.delete(target)
+        written.append(storage.save(target, ContentFile(buffer.getvalue())))
+    return written
+
+
+def describe(name, storage=default_storage):
+    """
+    Returns what ``Product.image_derivatives`` records for one stored image:
+    ``{'width', 'height', 'widths'}``, ``widths`` being those of the
+    derivatives that exist.
+    """
+    with storage.open(name, 'rb') as f:
+        # Only reads the header
+        width, height = Image.open(f).size
+    return {
+        'width': width,
+        'height': height,
+        'widths': [width for width, _ in available_derivatives(name, width, storage)],
+    }
+
+
+def record_derivatives(product, storage=default_storage):
+    """
+    Stores the size and derivative widths of ``product``'s images on the row.
+    Images that cannot be read are left out, so they render as plain
+    ``<img>``.
+    """
+    records = {}
+    for field in (product.image1, product.image2):
+        if not field:
+            continue
+        try:
+            records[field.name] = describe(field.name, storage)
+        except OSError:
+            continue
+    if records != product.image_derivatives:
+        product.image_derivatives = records
+        # An update rather than save(), which would run the post_save
+        # receivers (and this function) again
+        type(product)._default_manager.filter(pk=product.pk).update(image_derivatives=records)
@@ -0,0 +1,160 @@
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from industrialpartner import benchmark, stubcatalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the site under gunicorn against the stub catalog API and reports "
+        "p50/p95/p99 latency and throughput per step as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fixtures', default=os.path.join(settings.BASE_DIR, stubcatalog.DEFAULT_FIXTURES),
+            help="Recorded catalog responses for the stub (see stub_catalog --record).",
+        )
+        parser.add_argument('--concurrency', type=int, default=16, help="Simultaneous visitors.")
+        parser.add_argument('--duration', type=float, default=30, help="Seconds measured.")
+        parser.add_argument('--warmup', type=float, default=5, help="Seconds run before measuring.")
+        parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes.")
+        parser.add_argument('--threads', type=int, default=1, help="Threads per gunicorn worker.")
+        parser.add_argument(
+            '--asgi', action='store_true',
+            help="Run the ASGI entry point on uvicorn workers with CATALOG_ASYNC_VIEWS=1.",
+        )
+        parser.add_argument('--latency', type=float, default=0.05, help="Seconds the stub API takes per response.")
+        parser.add_argument('--jitter', type=float, default=0.02, help="Up to this many more seconds, at random.")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Share of API requests failing.")
+        parser.add_argument('--error-status', type=int, default=503)
+        parser.add_argument(
+            '--target', metavar='URL',
+            help="Benchmark a site that is already running (pointed at the stub or not) instead of starting gunicorn.",
+        )
+        parser.add_argument('--host', default='localhost', help="Host header of the main site; subdomains go in front.")
+        parser.add_argument('--seed', type=int, default=None, help="Makes the visitors' choices repeatable.")
+        parser.add_argument('--output', metavar='FILE', help="Write the results here instead of to stdout.")
+        parser.add_argument('--baseline', metavar='FILE', help="Earlier results to compare with; fails on a regression.")
+        parser.add_argument('--max-regression', type=float, default=0.2, help="Allowed p95/throughput change, e.g. 0.2.")
+        parser.add_argument('--max-error-rate', type=float, default=0.01)
+
+    def handle(self, *args, **options):
+        try:
+            fixtures = stubcatalog.Fixtures.load(options['fixtures'])
+            workload = benchmark.Workload(fixtures)
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f"Cannot load fixtures from {options['fixtures']}: {e}")
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read the baseline {options['baseline']}: {e}")
+        if not options['target'] and importlib.util.find_spec('gunicorn') is None:
+            raise CommandError("gunicorn is not installed (pip install gunicorn), or pass --target")
+
+        with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+            processes = []
+            try:
+                base_url = options['target'] or self.start_servers(options, workdir, processes)
+                samples, window = benchmark.run(
+                    base_url, workload, options['concurrency'], options['duration'], options['warmup'],
+                    host=options['host'], seed=options['seed'],
+                )
+            except RuntimeError as e:
+                raise CommandError(f"{e}{self.log_tails(workdir)}")
+            finally:
+                for process in reversed(processes):
+                    benchmark.stop(process)
+
+        config = {
+            name: options[name] for name in (
+                'concurrency', 'duration', 'warmup', 'workers', 'threads', 'asgi',
+                'latency', 'jitter', 'error_rate', 'target', 'seed',
+            )
+        }
+        config['fixtures'] = os.path.relpath(options['fixtures'], settings.BASE_DIR)
+        results = benchmark.summarize(samples, window, config)
+        if not results['steps']:
+            raise CommandError("No requests completed; is --duration long enough?")
+
+        text = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+            overall = results['overall']
+            self.stdout.write(
+                f"{overall['requests']} requests, {overall['throughput_rps']} requests/s, "
+                f"p50 {overall['p50_ms']}ms, p95 {overall['p95_ms']}ms, p99 {overall['p99_ms']}ms "
+                f"-> {options['output']}"
+            )
+        else:
+            self.stdout.write(text)
+
+        if baseline is not None:
+            problems = benchmark.compare(results, baseline, options['max_regression'], options['max_error_rate'])
+            if problems:
+                raise CommandError("Performance regression:\n  " + "\n  ".join(problems))
+
+    def start_servers(self, options, workdir, processes):
+        """
+        Starts the stub API and gunicorn, with a cache and snapshot directory
+        of their own so every run starts cold.
+
+        Returns:
+            str: URL of the site.
+        """
+        stub_port, site_port = benchmark.free_port(), benchmark.free_port()
+        stub = benchmark.start(
+            benchmark.manage_command(
+                'stub_catalog', '--fixtures', options['fixtures'], '--port', str(stub_port),
+                '--latency', str(options['latency']), '--jitter', str(options['jitter']),
+                '--error-rate', str(options['error_rate']), '--error-status', str(options['error_status']),
+            ),
+            os.path.join(workdir, 'stub.log'),
+        )
+        processes.append(stub)
+        stub_url = f"http://127.0.0.1:{stub_port}"
+        benchmark.wait_until_up(stub_url, stub)
+
+        env = dict(
+            os.environ,
+            CATALOG_API_URL=stub_url,
+            CACHE_LOCATION=os.path.join(workdir, 'cache.sqlite3'),
+            PRERENDER_ROOT=os.path.join(workdir, 'prerendered'),
+        )
+        command = [
+            sys.executable, '-m', 'gunicorn', '--bind', f"127.0.0.1:{site_port}",
+            '--workers', str(options['workers']), '--threads', str(options['threads']),
+        ]
+        if options['asgi']:
+            env['CATALOG_ASYNC_VIEWS'] = '1'
+            command += ['--worker-class', 'uvicorn.workers.UvicornWorker', 'industrialpartner_app.asgi:application']
+        else:
+            command.append('industrialpartner_app.wsgi:application')
+        site = benchmark.start(command, os.path.join(workdir, 'gunicorn.log'), env=env, cwd=settings.BASE_DIR)
+        processes.append(site)
+        site_url = f"http://127.0.0.1:{site_port}"
+        benchmark.wait_until_up(site_url + '/cart/count/', site)
+        return site_url
+
+    @staticmethod
+    def log_tails(workdir, lines=20):
+        # The work directory goes away with the servers, so failures quote
+        # their logs
+        tails = ''
+        for name in sorted(os.listdir(workdir)):
+            if name.endswith('.log'):
+                with open(os.path.join(workdir, name), encoding='utf-8', errors='replace') as f:
+                    tail = f.readlines()[-lines:]
+                if tail:
+                    tails += f"\n\n{name}:\n" + ''.join(tail).rstrip()
+        return tails
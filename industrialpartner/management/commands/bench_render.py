@@ -0,0 +1,107 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.shortcuts import render
+from django.template import loader
+from django.test import RequestFactory, override_settings
+
+from industrialpartner import fragments, views
+
+MANUFACTURER = 'Siemens'
+
+# Shared page chrome, timed on its own for the breakdown
+CHROME = ['industrialpartner/partials/navbar.html', 'industrialpartner/partials/footer.html']
+
+
+def _item(item_id):
+    return {
+        'ItemID': item_id,
+        'PartNumber': f"6ES7-214-{item_id}",
+        'PartNumberClean': f"6ES7214{item_id}",
+        'Description': f"Siemens SIMATIC S7-200 CPU module {item_id}, 24 V DC, 14 DI / 10 DO",
+        'Slug': f"6es7-214-{item_id}",
+        'Features': [{'Feature': f"Feature {n}"} for n in range(8)],
+        'Introductions': [{'Introduction': "Compact controller for small automation tasks."}],
+        'SimpleTypes': [{'SimpleType': 'PLC'}],
+        'Manufacturer': {
+            'ManufacturerID': 1, 'Manufacturer': MANUFACTURER, 'Lookup': 'SIEMENS',
+            'Synopsis': "Siemens is a global manufacturer of industrial automation equipment.",
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Times uncached renders of the product, manufacturer and a plain page, with "
+        "the navbar/footer fragment cache off (every block rendered) and warm."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+
+        def request(path, host):
+            req = factory.get(path, HTTP_HOST=host)
+            req.user = AnonymousUser()
+            return req
+
+        items = [_item(100 + n) for n in range(50)]
+        pages = {
+            'product': lambda: views.render_product_page(
+                request('/product/100/6es7-214-100', 'industrialpartner.com'), items[0], {'items': items},
+            ),
+            'manufacturer': lambda: views.render_manufacturer_page(
+                request('/', 'siemens.industrialpartner.com'), {'items': items, 'size': 50, 'pages': 20},
+                MANUFACTURER, 1, '',
+            ),
+            'about': lambda: render(request('/about', 'industrialpartner.com'), 'industrialpartner/about.html'),
+        }
+        chrome = [name for name in CHROME if self._exists(name)]
+        if chrome:
+            req = request('/', 'siemens.industrialpartner.com')
+            pages['navbar+footer'] = lambda: [
+                loader.render_to_string(name, {'manufacturer': MANUFACTURER}, req) for name in chrome
+            ]
+
+        dummy = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+        modes = [('off', dummy)]
+        if fragments.CACHE_ALIAS in settings.CACHES:
+            modes.append(('warm', settings.CACHES[fragments.CACHE_ALIAS]))
+
+        self.stdout.write(f"{'page':<14} {'fragments':<9} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'cpu ms':>8} {'bytes':>8}")
+        for name, page in pages.items():
+            # The partials rendered on their own bypass the cache blocks
+            for mode, config in modes[:1] if name == 'navbar+footer' else modes:
+                with override_settings(CACHES={**settings.CACHES, fragments.CACHE_ALIAS: config}):
+                    if mode == 'warm':
+                        caches[fragments.CACHE_ALIAS].clear()
+                    for _ in range(options['warmup']):
+                        page()
+                    walls, cpus = [], []
+                    for _ in range(options['iterations']):
+                        wall, cpu = time.perf_counter(), time.process_time()
+                        response = page()
+                        cpus.append(time.process_time() - cpu)
+                        walls.append(time.perf_counter() - wall)
+                size = len(response.content) if hasattr(response, 'content') else sum(map(len, response))
+                walls.sort()
+                self.stdout.write(
+                    f"{name:<14} {mode:<9} {statistics.fmean(walls) * 1000:8.2f} "
+                    f"{walls[len(walls) // 2] * 1000:8.2f} {walls[int(len(walls) * 0.95)] * 1000:8.2f} "
+                    f"{statistics.fmean(cpus) * 1000:8.2f} {size:8d}"
+                )
+
+    @staticmethod
+    def _exists(name):
+        try:
+            loader.get_template(name)
+        except loader.TemplateDoesNotExist:
+            return False
+        return True
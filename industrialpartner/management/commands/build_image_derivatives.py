@@ -0,0 +1,47 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.core.management.base import BaseCommand
+
+from industrialpartner import images
+from industrialpartner.models import Product
+
+
+class Command(BaseCommand):
+    help = "Writes the WebP derivatives of every product image, on a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes.")
+        parser.add_argument('--force', action='store_true', help="Rewrite derivatives that already exist.")
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        products = list(Product.objects.only('id', 'image1', 'image2', 'image_derivatives'))
+        names = set()
+        for product in products:
+            names.update(field.name for field in (product.image1, product.image2) if field)
+
+        written = failed = 0
+        # Resizing is CPU bound, so it runs in processes rather than threads;
+        # each one sets Django up for itself in case it was spawned, not forked
+        generate = partial(images.generate_derivatives, force=options['force'])
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+            futures = {executor.submit(generate, name): name for name in sorted(names)}
+            for future, name in futures.items():
+                try:
+                    written += len(future.result())
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f"{name}: {e}")
+
+        # What the template tag reads; only image headers are opened here
+        for product in products:
+            images.record_derivatives(product)
+
+        self.stdout.write(
+            f"Wrote {written} derivatives for {len(names)} images ({failed} failed) "
+            f"in {time.monotonic() - start:.1f}s"
+        )
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from industrialpartner import outbox
+
+
+class Command(BaseCommand):
+    help = "Delivers queued quote submissions to the catalog API, retrying failed ones with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep running and poll the outbox.")
+        parser.add_argument('--interval', type=float, default=10, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            delivered, failed = outbox.deliver_due()
+            if delivered or failed or not options['loop']:
+                self.stdout.write(f"Delivered {delivered} quote submissions, {failed} failed")
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
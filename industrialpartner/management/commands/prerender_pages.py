@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from industrialpartner import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the most requested product and manufacturer pages into static "
+        "HTML snapshots in PRERENDER_ROOT."
+    )
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument(
+            '--urls', metavar='FILE',
+            help="Traffic list: one URL or path per line, optionally preceded by its hit count.",
+        )
+        source.add_argument(
+            '--access-log', metavar='FILE',
+            help="Access log in common/combined format to count successful GETs from.",
+        )
+        parser.add_argument('--top', type=int, default=settings.PRERENDER_TOP, help="Number of pages to render.")
+        parser.add_argument(
+            '--host', default=urlsplit(settings.SITEMAP_BASE_URL).netloc,
+            help="Host for paths without one (every access log entry).",
+        )
+        parser.add_argument('--workers', type=int, default=settings.PRERENDER_WORKERS)
+        parser.add_argument('--loop', action='store_true', help="Keep running and re-render periodically.")
+        parser.add_argument(
+            '--interval', type=float, default=settings.PRERENDER_MAX_AGE / 2,
+            help="Seconds between runs with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.run(options)
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def run(self, options):
+        start = time.monotonic()
+        source = options['urls'] or options['access_log']
+        count = snapshots.urls_from_list if options['urls'] else snapshots.urls_from_log
+        try:
+            with open(source, encoding='utf-8', errors='replace') as f:
+                hits = count(f, options['host'])
+        except OSError as e:
+            raise CommandError(f"Cannot read {source}: {e}")
+        urls = snapshots.hottest(hits, options['top'])
+
+        def prerender(url):
+            try:
+                return snapshots.prerender(*url)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            written = sum(pool.map(prerender, urls))
+        self.stdout.write(
+            f"Rendered {written} of {len(urls)} pages into {settings.PRERENDER_ROOT} "
+            f"in {time.monotonic() - start:.1f}s"
+        )
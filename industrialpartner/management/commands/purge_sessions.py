@@ -0,0 +1,23 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Deletes expired sessions from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep running and purge periodically.")
+        parser.add_argument('--interval', type=float, default=3600, help="Seconds between purges with --loop.")
+
+    def handle(self, *args, **options):
+        engine = import_module(settings.SESSION_ENGINE)
+        while True:
+            deleted = engine.SessionStore.clear_expired()
+            if deleted or not options['loop']:
+                self.stdout.write(f"Deleted {deleted or 0} expired sessions")
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
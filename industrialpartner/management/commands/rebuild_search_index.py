@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from industrialpartner import search
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text part number search index from the catalog mirror."
+
+    def handle(self, *args, **options):
+        count = search.rebuild_index()
+        self.stdout.write(f"Indexed {count} items")
@@ -0,0 +1,66 @@
+import json
+import os
+import threading
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from industrialpartner import stubcatalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Serves recorded catalog API responses locally (point CATALOG_API_URL at it), "
+        "or records them from the real API with --record."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fixtures', default=os.path.join(settings.BASE_DIR, stubcatalog.DEFAULT_FIXTURES),
+            help="Fixture file to serve from, or to write with --record.",
+        )
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response.")
+        parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many more seconds, at random.")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with an error.")
+        parser.add_argument('--error-status', type=int, default=503)
+        parser.add_argument(
+            '--record', metavar='PATHS_FILE',
+            help="Fetch the API paths listed in this file (one per line, with query string) into --fixtures.",
+        )
+        parser.add_argument('--base-url', default=settings.CATALOG_API_URL, help="API to record from.")
+
+    def handle(self, *args, **options):
+        if options['record']:
+            return self.record(options)
+        try:
+            fixtures = stubcatalog.Fixtures.load(options['fixtures'])
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Cannot load fixtures from {options['fixtures']}: {e}")
+        server = stubcatalog.serve(
+            fixtures, options['host'], options['port'],
+            latency=options['latency'], jitter=options['jitter'],
+            error_rate=options['error_rate'], error_status=options['error_status'],
+        )
+        self.stdout.write(f"Serving {len(fixtures.responses)} recorded responses at {server.url}", ending='\n')
+        self.stdout.flush()
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+
+    def record(self, options):
+        try:
+            with open(options['record'], encoding='utf-8') as f:
+                paths = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+            fixture = stubcatalog.record(options['base_url'], paths)
+        except requests.RequestException as e:
+            raise CommandError(f"Failed to fetch the catalog: {e}")
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['record']}: {e}")
+        os.makedirs(os.path.dirname(options['fixtures']) or '.', exist_ok=True)
+        with open(options['fixtures'], 'w', encoding='utf-8') as f:
+            json.dump(fixture, f, indent=1)
+        self.stdout.write(f"Recorded {len(paths)} responses from {options['base_url']} into {options['fixtures']}")
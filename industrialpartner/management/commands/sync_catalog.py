@@ -0,0 +1,190 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from industrialpartner import catalog, mirror
+from industrialpartner.models import CatalogSyncCheckpoint, CatalogSyncRun
+
+
+class Command(BaseCommand):
+    help = (
+        "Pulls the manufacturer and item catalog into the local mirror tables and, on a full "
+        "sync, deletes the rows that are gone upstream. "
+        "With --incremental only pages and rows that changed since the last run are written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help="Pages fetched in parallel.")
+        parser.add_argument('--retries', type=int, default=3, help="Attempts per page before giving up.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Changed rows per bulk upsert.")
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help=(
+                "Send conditional requests and skip pages and rows whose content hash is unchanged. "
+                "Only pages the API answered with an ETag or Last-Modified header can come back as "
+                "304 Not Modified; every other page is still downloaded in full and only its writes "
+                "are skipped."
+            ),
+        )
+        parser.add_argument('--skip-manufacturers', action='store_true')
+        parser.add_argument('--skip-items', action='store_true')
+
+    def handle(self, *args, **options):
+        self.retries = options['retries']
+        self.batch_size = options['batch_size']
+        self.incremental = options['incremental']
+        self.run = CatalogSyncRun.objects.create(
+            mode=CatalogSyncRun.INCREMENTAL if self.incremental else CatalogSyncRun.FULL
+        )
+        self.pages_without_validators = 0
+        start = time.monotonic()
+        try:
+            manufacturer_ids = item_ids = None
+            if not options['skip_manufacturers']:
+                manufacturer_ids = self.sync_endpoint(
+                    '/manufacturer', {'brand_name': ''}, 'ManufacturerID',
+                    mirror.save_manufacturers, mirror.changed_manufacturers, options['workers'],
+                )
+            if not options['skip_items']:
+                item_ids = self.sync_endpoint(
+                    '/items', {}, 'ItemID',
+                    mirror.save_items, mirror.changed_items, options['workers'],
+                )
+            # Only a full sync sees every row; an incremental one skips
+            # unchanged pages.  Items go first so manufacturers they no
+            # longer refer to can go too.
+            if not self.incremental:
+                self.prune('items', item_ids, mirror.prune_items)
+                self.prune('manufacturers', manufacturer_ids, mirror.prune_manufacturers)
+        except Exception as e:
+            self.run.error = str(e) if isinstance(e, CommandError) else f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.run.duration = time.monotonic() - start
+            self.run.save()
+
+        run = self.run
+        self.stdout.write(
+            f"{run.get_mode_display()} sync finished in {run.duration:.1f}s: "
+            f"{run.pages_fetched} pages fetched, {run.pages_unchanged} unchanged, "
+            f"{run.rows_changed} rows changed, {run.rows_unchanged} unchanged, {run.rows_removed} removed"
+        )
+        if self.incremental and self.pages_without_validators:
+            self.stderr.write(
+                f"{self.pages_without_validators} pages came without an ETag or Last-Modified header, "
+                "so the next incremental sync will download them in full again"
+            )
+
+    def prune(self, name, seen_ids, prune):
+        if seen_ids is None:
+            return
+        if not seen_ids:
+            # An empty listing is far likelier an upstream fault than an
+            # empty catalog, so keep the mirror as it is
+            self.stderr.write(f"The API listed no {name}; not removing any from the mirror")
+            return
+        self.run.rows_removed += prune(seen_ids)
+
+    def fetch_page(self, path, params, page, checkpoint):
+        # Straight to the API: a sync must not fill the data cache
+        headers = {}
+        if checkpoint is not None:
+            if checkpoint.etag:
+                headers['If-None-Match'] = checkpoint.etag
+            if checkpoint.last_modified:
+                headers['If-Modified-Since'] = checkpoint.last_modified
+
+        for attempt in range(1, self.retries + 1):
+            try:
+                response = catalog.get(path, dict(params, page=page), headers=headers)
+                if response.status_code == 304:
+                    return response, None
+                response.raise_for_status()
+                return response, response.json()
+            except requests.RequestException as e:
+                if attempt == self.retries:
+                    raise CommandError(f"Failed to fetch {path} page {page}: {e}")
+
+    def sync_endpoint(self, path, params, id_key, save, changed, workers):
+        """
+        Fetches every page of ``path`` and saves the rows that changed.
+
+        Returns:
+            set: The ``id_key`` values of the rows on the pages fetched, which
+            is every row upstream unless pages were skipped as unmodified.
+        """
+        checkpoints = {}
+        seen = set()
+        if self.incremental:
+            checkpoints = {cp.page: cp for cp in CatalogSyncCheckpoint.objects.filter(endpoint=path)}
+
+        pending = []
+        pending_checkpoints = []
+
+        def flush():
+            # Checkpoints are only written together with the rows they cover,
+            # so an interrupted run never marks unsaved pages as synced
+            if pending:
+                save(pending)
+                pending.clear()
+            if pending_checkpoints:
+                CatalogSyncCheckpoint.objects.bulk_create(
+                    pending_checkpoints, update_conflicts=True,
+                    unique_fields=['endpoint', 'page'],
+                    update_fields=['content_hash', 'etag', 'last_modified', 'fetched_at'],
+                )
+                pending_checkpoints.clear()
+
+        def process(page, response, data):
+            # Runs on this thread only: pages are fetched concurrently but
+            # SQLite allows a single writer
+            self.run.pages_fetched += 1
+            if data is None:
+                self.run.pages_unchanged += 1
+                return
+            items = data.get('items', [])
+            seen.update(item[id_key] for item in items)
+            page_hash = mirror.payload_hash(items)
+            checkpoint = checkpoints.get(page)
+            if checkpoint is not None and checkpoint.content_hash == page_hash:
+                self.run.pages_unchanged += 1
+                self.run.rows_unchanged += len(items)
+            else:
+                rows = changed(items) if self.incremental else items
+                self.run.rows_changed += len(rows)
+                self.run.rows_unchanged += len(items) - len(rows)
+                pending.extend(rows)
+            if not (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+                self.pages_without_validators += 1
+            pending_checkpoints.append(CatalogSyncCheckpoint(
+                endpoint=path, page=page, content_hash=page_hash,
+                etag=response.headers.get('ETag', ''),
+                last_modified=response.headers.get('Last-Modified', ''),
+                fetched_at=timezone.now(),
+            ))
+            if len(pending) >= self.batch_size:
+                flush()
+
+        response, first = self.fetch_page(path, params, 1, checkpoints.get(1))
+        process(1, response, first)
+        if first is None:
+            # Page 1 was not modified, so its page count still holds
+            pages = max(checkpoints, default=1)
+        else:
+            pages = first.get('pages') or 1
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self.fetch_page, path, params, page, checkpoints.get(page)): page
+                for page in range(2, pages + 1)
+            }
+            for future in as_completed(futures):
+                process(futures[future], *future.result())
+
+        flush()
+        # Forget pages past the end of a catalog that shrank
+        CatalogSyncCheckpoint.objects.filter(endpoint=path, page__gt=pages).delete()
+        return seen
@@ -0,0 +1,181 @@
+# industrialpartner/middleware.py
+"""
+Request handling middleware.
+
+``StaticFilesMiddleware`` serves ``STATIC_ROOT`` and ``MEDIA_ROOT`` from the
+application server itself (see ``industrialpartner.files``), ahead of the
+rest of the stack.
+
+``SnapshotMiddleware`` answers the busiest product and manufacturer pages from
+their pre-rendered snapshots (see ``industrialpartner.snapshots``) without
+running the view.
+
+Under ASGI both only look at the request on the event loop; the file lookup
+and open run on a worker thread, so a slow disk never blocks the loop.
+
+``CatalogStaleMiddleware`` flags responses that were built from fallback data
+while the catalog API is failing (see ``catalog.served_stale``), and
+``cache_page`` is Django's decorator of the same name except that it never
+stores such a page, so the site returns to live data as soon as the API is
+back.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.middleware.cache import CacheMiddleware
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import decorator_from_middleware_with_args
+
+from . import catalog, files, snapshots
+
+
+def _serve_off_loop(serve, request):
+    # Not thread sensitive: file reads need no database connection and must
+    # not queue up behind each other on the one shared sync thread
+    return sync_to_async(serve, thread_sensitive=False)(request)
+
+
+class StaticFilesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        self._hashed_names = None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.matches(request):
+            response = await _serve_off_loop(self.serve, request)
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+    def matches(self, request):
+        # Cheap enough for the event loop: no file system access
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        return any(url and request.path.startswith(url) for url in (settings.STATIC_URL, settings.MEDIA_URL))
+
+    def hashed_names(self):
+        # Content-hashed names from the collectstatic manifest; what is
+        # served under them never changes
+        if self._hashed_names is None:
+            self._hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        return self._hashed_names
+
+    def serve(self, request):
+        """
+        Returns the response for a static or media file, or None to let the
+        request through (other methods, other paths, missing files).
+        """
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if settings.STATIC_URL and request.path.startswith(settings.STATIC_URL):
+            name = request.path[len(settings.STATIC_URL):]
+            path = files.resolve(settings.STATIC_ROOT, name)
+            if path is None:
+                return None
+            if name in self.hashed_names():
+                return files.serve(request, path, settings.STATIC_IMMUTABLE_MAX_AGE, immutable=True)
+            return files.serve(request, path, settings.STATIC_MAX_AGE)
+        if settings.MEDIA_URL and request.path.startswith(settings.MEDIA_URL):
+            path = files.resolve(settings.MEDIA_ROOT, request.path[len(settings.MEDIA_URL):])
+            if path is None:
+                return None
+            return files.serve(request, path, settings.MEDIA_MAX_AGE)
+        return None
+
+
+class SnapshotMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.matches(request):
+            response = await _serve_off_loop(self.serve, request)
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+    def matches(self, request):
+        # Only pages prerender_pages snapshots can have one
+        if request.method not in ('GET', 'HEAD') or snapshots.BYPASS_HEADER in request.headers:
+            return False
+        return snapshots.is_prerenderable(request.path_info)
+
+    def serve(self, request):
+        """
+        Returns the response from a fresh snapshot of the requested page, or
+        None to render it (other methods, no or old snapshot, and the
+        prerender command's own requests).
+        """
+        if request.method not in ('GET', 'HEAD') or snapshots.BYPASS_HEADER in request.headers:
+            return None
+        path = snapshots.fresh_snapshot(request)
+        if path is None:
+            return None
+        response = files.serve(request, path, settings.PRERENDER_BROWSER_MAX_AGE, content_type=snapshots.CONTENT_TYPE)
+        response['X-Snapshot'] = '1'
+        return response
+
+
+class CatalogStaleMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        catalog.reset_served_stale()
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        catalog.reset_served_stale()
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if catalog.served_stale():
+            response['Warning'] = '110 - "Response is Stale"'
+            response['X-Catalog-Stale'] = '1'
+            patch_cache_control(response, max_age=0)
+        return response
+
+
+class CatalogCacheMiddleware(CacheMiddleware):
+    def process_response(self, request, response):
+        if catalog.served_stale():
+            return response
+        return super().process_response(request, response)
+
+
+def cache_page(timeout, *, cache=None, key_prefix=None):
+    """
+    ``django.views.decorators.cache.cache_page`` that skips pages rendered
+    from stale catalog data.
+    """
+    return decorator_from_middleware_with_args(CatalogCacheMiddleware)(
+        page_timeout=timeout, cache_alias=cache, key_prefix=key_prefix,
+    )
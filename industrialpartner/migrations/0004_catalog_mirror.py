@@ -0,0 +1,69 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('industrialpartner', '0003_product_image1_product_image2'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogItem',
+            fields=[
+                ('ItemID', models.IntegerField(primary_key=True, serialize=False)),
+                ('PartNumber', models.CharField(db_index=True, max_length=255)),
+                ('Description', models.TextField(blank=True)),
+                ('Slug', models.CharField(blank=True, max_length=255)),
+                ('payload', models.JSONField(default=dict)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatalogManufacturer',
+            fields=[
+                ('ManufacturerID', models.IntegerField(primary_key=True, serialize=False)),
+                ('Manufacturer', models.CharField(db_index=True, max_length=255)),
+                ('Lookup', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('Synopsis', models.TextField(blank=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatalogSimpleType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('SimpleType', models.CharField(db_index=True, max_length=255)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='simple_types', to='industrialpartner.catalogitem')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='catalogitem',
+            name='manufacturer',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='items', to='industrialpartner.catalogmanufacturer'),
+        ),
+        migrations.CreateModel(
+            name='CatalogIntroduction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('Introduction', models.TextField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='introductions', to='industrialpartner.catalogitem')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatalogFeature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('Feature', models.TextField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='features', to='industrialpartner.catalogitem')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='catalogitem',
+            index=models.Index(fields=['manufacturer', 'ItemID'], name='industrialp_manufac_c513d4_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('industrialpartner', '0004_catalog_mirror'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=50)),
+                ('page', models.IntegerField()),
+                ('content_hash', models.CharField(max_length=40)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('fetched_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatalogSyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('full', 'Full'), ('incremental', 'Incremental')], max_length=20)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('pages_fetched', models.IntegerField(default=0)),
+                ('pages_unchanged', models.IntegerField(default=0)),
+                ('rows_changed', models.IntegerField(default=0)),
+                ('rows_unchanged', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='catalogitem',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='catalogmanufacturer',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.AddConstraint(
+            model_name='catalogsynccheckpoint',
+            constraint=models.UniqueConstraint(fields=('endpoint', 'page'), name='unique_sync_checkpoint_page'),
+        ),
+    ]
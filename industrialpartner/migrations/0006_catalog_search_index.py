@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('industrialpartner', '0005_catalog_delta_sync'),
+    ]
+
+    operations = [
+        # Full-text index over the catalog mirror; rowid is the ItemID.
+        # See industrialpartner.search.
+        migrations.RunSQL(
+            sql="""
+                CREATE VIRTUAL TABLE industrialpartner_catalogsearch USING fts5(
+                    part_number,
+                    part_number_clean,
+                    description,
+                    manufacturer,
+                    tokenize = 'unicode61',
+                    prefix = '2 3 4'
+                )
+            """,
+            reverse_sql="DROP TABLE industrialpartner_catalogsearch",
+        ),
+    ]
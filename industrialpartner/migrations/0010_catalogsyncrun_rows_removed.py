@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-18 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('industrialpartner', '0009_product_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogsyncrun',
+            name='rows_removed',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.13 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+def fill_keys(apps, schema_editor):
+    # Same folding as industrialpartner.mirror.fold
+    CatalogManufacturer = apps.get_model('industrialpartner', 'CatalogManufacturer')
+    CatalogSimpleType = apps.get_model('industrialpartner', 'CatalogSimpleType')
+    manufacturers = list(CatalogManufacturer.objects.only('Manufacturer', 'Lookup'))
+    for manufacturer in manufacturers:
+        manufacturer.manufacturer_key = (manufacturer.Manufacturer or '').casefold()
+        manufacturer.lookup_key = (manufacturer.Lookup or '').casefold()
+    CatalogManufacturer.objects.bulk_update(manufacturers, ['manufacturer_key', 'lookup_key'], batch_size=1000)
+    simple_types = list(CatalogSimpleType.objects.only('SimpleType'))
+    for simple_type in simple_types:
+        simple_type.simple_type_key = (simple_type.SimpleType or '').casefold()
+    CatalogSimpleType.objects.bulk_update(simple_types, ['simple_type_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('industrialpartner', '0010_catalogsyncrun_rows_removed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogmanufacturer',
+            name='lookup_key',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='catalogmanufacturer',
+            name='manufacturer_key',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='catalogsimpletype',
+            name='simple_type_key',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.RunPython(fill_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,279 @@
+# industrialpartner/mirror.py
+"""
+Local mirror of the upstream catalog.
+
+``save_items`` and ``save_manufacturers`` store pages of ``/items`` and
+``/manufacturer`` results in the Catalog* tables (see the sync_catalog
+management command), ``prune_items`` and ``prune_manufacturers`` drop the
+rows a full sync no longer saw upstream, and ``get`` answers catalog API paths from those tables
+in the same JSON shape the API returns.  With ``settings.CATALOG_MIRROR_READS``
+enabled the catalog client consults the mirror first and only goes upstream
+for what it cannot answer.
+"""
+
+import hashlib
+import json
+import math
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from . import search
+from .models import (
+    CatalogFeature,
+    CatalogIntroduction,
+    CatalogItem,
+    CatalogManufacturer,
+    CatalogSimpleType,
+)
+
+# Primary keys per DELETE statement, well below SQLite's variable limit
+PRUNE_BATCH_SIZE = 500
+
+ITEM_PATH = re.compile(r'^/?items/(\d+)/?$')
+
+ITEM_FIELDS = ['PartNumber', 'Description', 'Slug', 'manufacturer', 'payload', 'content_hash']
+MANUFACTURER_FIELDS = [
+    'Manufacturer', 'Lookup', 'manufacturer_key', 'lookup_key', 'Synopsis', 'payload', 'content_hash',
+]
+
+# Above every character, so ``key >= prefix AND key < prefix + PREFIX_END``
+# is a prefix match SQLite answers from the index (LIKE cannot use it)
+PREFIX_END = '\U0010ffff'
+
+
+def fold(value):
+    """
+    Returns the case-folded form stored in the mirror's ``*_key`` columns.
+    """
+    return (value or '').casefold()
+
+
+def payload_hash(data):
+    """
+    Returns a stable SHA-1 of a JSON payload, independent of key order.
+    """
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def _changed(model, objects, id_key):
+    hashes = {obj[id_key]: payload_hash(obj) for obj in objects}
+    stored = dict(
+        model.objects.filter(pk__in=hashes).values_list('pk', 'content_hash')
+    )
+    return [obj for obj in objects if stored.get(obj[id_key]) != hashes[obj[id_key]]]
+
+
+def changed_items(items):
+    """
+    Returns the items whose payload differs from the mirrored copy.
+    """
+    return _changed(CatalogItem, items, 'ItemID')
+
+
+def changed_manufacturers(manufacturers):
+    return _changed(CatalogManufacturer, manufacturers, 'ManufacturerID')
+
+
+def _manufacturer_row(data):
+    return CatalogManufacturer(
+        ManufacturerID=data['ManufacturerID'],
+        Manufacturer=data.get('Manufacturer') or '',
+        Lookup=data.get('Lookup') or '',
+        manufacturer_key=fold(data.get('Manufacturer')),
+        lookup_key=fold(data.get('Lookup')),
+        Synopsis=data.get('Synopsis') or '',
+        payload=data,
+        content_hash=payload_hash(data),
+    )
+
+
+def _upsert(model, rows, fields):
+    pk = model._meta.pk.name
+    model.objects.bulk_create(rows, update_conflicts=True, unique_fields=[pk], update_fields=fields)
+
+
+def save_manufacturers(manufacturers):
+    """
+    Upserts manufacturer objects as returned by ``/manufacturer``.
+    """
+    _upsert(CatalogManufacturer, [_manufacturer_row(data) for data in manufacturers], MANUFACTURER_FIELDS)
+
+
+@transaction.atomic
+def save_items(items):
+    """
+    Upserts item objects as returned by ``/items`` together with their
+    manufacturers, features, introductions and simple types.
+    """
+    manufacturers = {}
+    for item in items:
+        manufacturer = item.get('Manufacturer')
+        if manufacturer and manufacturer.get('ManufacturerID') is not None:
+            manufacturers[manufacturer['ManufacturerID']] = manufacturer
+    # Only fill in manufacturers the mirror has not seen; the /manufacturer
+    # listing stays the source of truth for existing rows
+    CatalogManufacturer.objects.bulk_create(
+        [_manufacturer_row(data) for data in manufacturers.values()], ignore_conflicts=True
+    )
+
+    rows = [
+        CatalogItem(
+            ItemID=item['ItemID'],
+            PartNumber=item.get('PartNumber') or '',
+            Description=item.get('Description') or '',
+            Slug=item.get('Slug') or '',
+            manufacturer_id=(item.get('Manufacturer') or {}).get('ManufacturerID'),
+            payload=item,
+            content_hash=payload_hash(item),
+        )
+        for item in items
+    ]
+    _upsert(CatalogItem, rows, ITEM_FIELDS)
+    search.index_items(items)
+
+    # Child rows are replaced wholesale, but only for items whose payload
+    # carries that list at all
+    for model, key, field in (
+        (CatalogFeature, 'Features', 'Feature'),
+        (CatalogIntroduction, 'Introductions', 'Introduction'),
+        (CatalogSimpleType, 'SimpleTypes', 'SimpleType'),
+    ):
+        with_children = [item for item in items if key in item]
+        model.objects.filter(item_id__in=[item['ItemID'] for item in with_children]).delete()
+        rows = [
+            model(item_id=item['ItemID'], **{field: entry.get(field) or ''})
+            for item in with_children
+            for entry in item[key] or []
+        ]
+        if model is CatalogSimpleType:
+            for row in rows:
+                row.simple_type_key = fold(row.SimpleType)
+        model.objects.bulk_create(rows)
+
+
+def _prune(queryset, seen_ids):
+    stale = sorted(set(queryset.values_list('pk', flat=True)) - set(seen_ids))
+    for start in range(0, len(stale), PRUNE_BATCH_SIZE):
+        queryset.filter(pk__in=stale[start:start + PRUNE_BATCH_SIZE]).delete()
+    return stale
+
+
+@transaction.atomic
+def prune_items(seen_ids):
+    """
+    Deletes mirrored items (with their child rows and search index entries)
+    whose ID is not in ``seen_ids``, the IDs a complete ``/items`` listing
+    returned.
+
+    Returns:
+        int: The number of items deleted.
+    """
+    stale = _prune(CatalogItem.objects.all(), seen_ids)
+    search.remove_items(stale)
+    return len(stale)
+
+
+@transaction.atomic
+def prune_manufacturers(seen_ids):
+    """
+    Deletes mirrored manufacturers whose ID is not in ``seen_ids``, the IDs a
+    complete ``/manufacturer`` listing returned.  Manufacturers that mirrored
+    items still refer to are kept, as ``save_items`` adds those on its own.
+
+    Returns:
+        int: The number of manufacturers deleted.
+    """
+    queryset = CatalogManufacturer.objects.filter(items__isnull=True)
+    return len(_prune(queryset, seen_ids))
+
+
+def _page(queryset, params, order_by):
+    size = settings.CATALOG_MIRROR_PAGE_SIZE
+    try:
+        page = max(int(params.get('page', 1)), 1)
+    except (TypeError, ValueError):
+        page = 1
+    total = queryset.count()
+    offset = (page - 1) * size
+    payloads = queryset.order_by(*order_by).values_list('payload', flat=True)[offset:offset + size]
+    return {
+        'items': list(payloads),
+        'total': total,
+        'page': page,
+        'size': size,
+        'pages': math.ceil(total / size),
+    }
+
+
+def _manufacturer_ids(**filters):
+    return CatalogManufacturer.objects.filter(**filters).values('pk')
+
+
+def _items(params):
+    # Every filter is an exact match on an indexed column (or the full-text
+    # index), so a listing page never scans the mirror
+    queryset = CatalogItem.objects.all()
+    if params.get('manufacturer_lookup'):
+        queryset = queryset.filter(manufacturer_id__in=_manufacturer_ids(lookup_key=fold(params['manufacturer_lookup'])))
+    if params.get('manufacturer_id'):
+        queryset = queryset.filter(manufacturer_id=params['manufacturer_id'])
+    if params.get('manufacturer'):
+        key = fold(params['manufacturer'])
+        queryset = queryset.filter(
+            Q(manufacturer_id__in=_manufacturer_ids(manufacturer_key=key))
+            | Q(manufacturer_id__in=_manufacturer_ids(lookup_key=key))
+        )
+    if params.get('simpletype'):
+        queryset = queryset.filter(ItemID__in=CatalogSimpleType.objects.filter(
+            simple_type_key=fold(params['simpletype'])
+        ).values('item_id'))
+    if params.get('part_number'):
+        if search.is_available():
+            queryset = search.narrow(queryset, params['part_number'])
+        else:
+            queryset = queryset.filter(PartNumber__icontains=params['part_number'])
+    return _page(queryset, params, ['ItemID'])
+
+
+def _manufacturers(params):
+    queryset = CatalogManufacturer.objects.all()
+    brand_name = fold(params.get('brand_name'))
+    if brand_name == '#':
+        # Names that do not start with a letter
+        queryset = queryset.filter(Q(manufacturer_key__lt='a') | Q(manufacturer_key__gt='z' + PREFIX_END))
+    elif brand_name:
+        queryset = queryset.filter(manufacturer_key__gte=brand_name, manufacturer_key__lt=brand_name + PREFIX_END)
+    return _page(queryset, params, ['Manufacturer', 'ManufacturerID'])
+
+
+def is_populated():
+    return CatalogItem.objects.exists()
+
+
+def get(path, params=None):
+    """
+    Answers a catalog GET from the mirror.
+
+    Returns:
+        The JSON-shaped response, or None when the mirror cannot answer it
+        (unknown path, item not mirrored, or a listing-only item payload).
+    """
+    params = params or {}
+    match = ITEM_PATH.match(path)
+    if match:
+        payload = CatalogItem.objects.filter(ItemID=match.group(1)).values_list('payload', flat=True).first()
+        # Listing payloads may lack the detail-only lists the product page needs
+        if payload is None or 'Features' not in payload:
+            return None
+        return payload
+
+    endpoint = path.strip('/')
+    if endpoint == 'items':
+        return _items(params) if is_populated() else None
+    if endpoint == 'manufacturer':
+        return _manufacturers(params) if CatalogManufacturer.objects.exists() else None
+    return None
@@ -1,12 +1,173 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 
 class Product(models.Model):
     PartNumber = models.CharField(max_length=100)
     Description = models.TextField()
     image1 = models.ImageField(upload_to='images/', blank=True)
     image2 = models.ImageField(upload_to='images/', blank=True)
+    # Homepage strip: featured products first (lowest featured_order first),
+    # then the most recently added ones
+    featured = models.BooleanField(default=False)
+    featured_order = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Stored name of each image -> its size and the widths of its WebP
+    # derivatives (see industrialpartner.images.record_derivatives), so pages
+    # never open the files to build srcset
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
 
     # Add any other fields you need for your product
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-featured', 'featured_order', '-created_at'], name='product_featured_idx'),
+        ]
+
     def __str__(self):
         return self.PartNumber  # Return the PartNumber as the string representation of the object
+
+
+# Local mirror of the upstream catalog, filled by the sync_catalog management
+# command. Field names follow the catalog API so rows map 1:1 onto payloads.
+
+class CatalogManufacturer(models.Model):
+    ManufacturerID = models.IntegerField(primary_key=True)
+    Manufacturer = models.CharField(max_length=255, db_index=True)
+    Lookup = models.CharField(max_length=255, blank=True, db_index=True)
+    # Manufacturer and Lookup case-folded (mirror.fold), so the mirror's
+    # case-insensitive filters are exact or range matches on an index
+    manufacturer_key = models.CharField(max_length=255, blank=True, db_index=True)
+    lookup_key = models.CharField(max_length=255, blank=True, db_index=True)
+    Synopsis = models.TextField(blank=True)
+    payload = models.JSONField(default=dict)  # Manufacturer object as returned by the API
+    content_hash = models.CharField(max_length=40, blank=True)  # SHA-1 of the payload
+    synced_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.Manufacturer
+
+
+class CatalogItem(models.Model):
+    ItemID = models.IntegerField(primary_key=True)
+    PartNumber = models.CharField(max_length=255, db_index=True)
+    Description = models.TextField(blank=True)
+    Slug = models.CharField(max_length=255, blank=True)
+    manufacturer = models.ForeignKey(
+        CatalogManufacturer, null=True, on_delete=models.SET_NULL, related_name='items'
+    )
+    payload = models.JSONField(default=dict)  # Item object as returned by the API
+    content_hash = models.CharField(max_length=40, blank=True)  # SHA-1 of the payload
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['manufacturer', 'ItemID']),
+        ]
+
+    def __str__(self):
+        return self.PartNumber
+
+
+class CatalogFeature(models.Model):
+    item = models.ForeignKey(CatalogItem, on_delete=models.CASCADE, related_name='features')
+    Feature = models.TextField()
+
+    def __str__(self):
+        return self.Feature
+
+
+class CatalogIntroduction(models.Model):
+    item = models.ForeignKey(CatalogItem, on_delete=models.CASCADE, related_name='introductions')
+    Introduction = models.TextField()
+
+    def __str__(self):
+        return self.Introduction
+
+
+class CatalogSimpleType(models.Model):
+    item = models.ForeignKey(CatalogItem, on_delete=models.CASCADE, related_name='simple_types')
+    SimpleType = models.CharField(max_length=255, db_index=True)
+    simple_type_key = models.CharField(max_length=255, blank=True, db_index=True)  # SimpleType case-folded
+
+    def __str__(self):
+        return self.SimpleType
+
+
+class CatalogSyncCheckpoint(models.Model):
+    # What the last sync saw for one listing page, so the next incremental
+    # run can skip pages that did not change
+    endpoint = models.CharField(max_length=50)
+    page = models.IntegerField()
+    content_hash = models.CharField(max_length=40)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    fetched_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['endpoint', 'page'], name='unique_sync_checkpoint_page'),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} page {self.page}"
+
+
+class CatalogSyncRun(models.Model):
+    FULL = 'full'
+    INCREMENTAL = 'incremental'
+    MODE_CHOICES = [(FULL, 'Full'), (INCREMENTAL, 'Incremental')]
+
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES)
+    started_at = models.DateTimeField(auto_now_add=True)
+    duration = models.FloatField(null=True, blank=True)  # seconds
+    pages_fetched = models.IntegerField(default=0)
+    pages_unchanged = models.IntegerField(default=0)  # 304 or identical page hash
+    rows_changed = models.IntegerField(default=0)
+    rows_unchanged = models.IntegerField(default=0)
+    rows_removed = models.IntegerField(default=0)  # gone upstream, deleted by a full sync
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.get_mode_display()} sync at {self.started_at}"
+
+
+# Quote submissions waiting to be delivered to the catalog API (see
+# industrialpartner.outbox). A quote row carries the RFQ itself; request-info
+# and addon rows hang off it and are sent once it has an upstream QuoteID.
+
+class QuoteOutbox(models.Model):
+    QUOTE = 'quote'
+    REQUEST_INFO = 'request_info'
+    ADDON = 'addon'
+    KIND_CHOICES = [(QUOTE, 'Quote'), (REQUEST_INFO, 'Request info'), (ADDON, 'Addon')]
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    DELIVERED = 'delivered'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (DELIVERED, 'Delivered'),
+        (FAILED, 'Failed'),
+    ]
+
+    key = models.UUIDField(default=uuid.uuid4, unique=True)  # Sent as the Idempotency-Key header
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='follow_ups')
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    quote_id = models.IntegerField(null=True, blank=True)  # QuoteID assigned by the API
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.key} ({self.status})"
@@ -0,0 +1,199 @@
+# industrialpartner/outbox.py
+"""
+Durable outbox for quote submissions.
+
+Views store an RFQ with ``enqueue_quote`` (and later extras with
+``enqueue_follow_up``) and answer right away; the rows are POSTed to the
+catalog API by ``deliver_due``, which runs on a background thread of the web
+worker right after the submit and periodically from the deliver_quotes
+management command.  Failed deliveries are retried with exponential backoff.
+Every row carries a UUID that is sent as the ``Idempotency-Key`` header, so a
+retried POST whose first response was lost does not create a second quote.
+
+A row is claimed by bumping its attempt counter in a conditional UPDATE, so
+several workers can deliver from the same table without sending a row twice;
+a claim that is never finished (crashed worker) expires after
+``settings.QUOTE_OUTBOX_LEASE`` seconds.
+"""
+
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import catalog
+from .models import QuoteOutbox
+
+PATHS = {
+    QuoteOutbox.QUOTE: '/quotes',
+    QuoteOutbox.REQUEST_INFO: '/quotes/request-info/{quote_id}',
+    QuoteOutbox.ADDON: '/quotes/addon/{quote_id}',
+}
+
+# Upstream answers that will not change on a retry
+PERMANENT_STATUSES = {400, 401, 403, 404, 405, 410, 422}
+
+_executor = None
+_executor_pid = None
+_scheduled = threading.Event()
+_executor_lock = threading.Lock()
+
+
+@transaction.atomic
+def enqueue_quote(payload, request_info=None):
+    """
+    Stores an RFQ for delivery to ``/quotes``, optionally together with the
+    request-info record that follows it.
+
+    Returns:
+        QuoteOutbox: The quote row; its ``key`` identifies the submission.
+    """
+    submission = QuoteOutbox.objects.create(kind=QuoteOutbox.QUOTE, payload=payload)
+    if request_info is not None:
+        enqueue_follow_up(submission, QuoteOutbox.REQUEST_INFO, request_info)
+    transaction.on_commit(schedule_delivery)
+    return submission
+
+
+def enqueue_follow_up(submission, kind, payload):
+    """
+    Stores a request-info or addon record for a quote.  It is sent once the
+    quote has its QuoteID, which is filled into the payload at that point.
+    """
+    follow_up = QuoteOutbox.objects.create(kind=kind, parent=submission, payload=payload)
+    transaction.on_commit(schedule_delivery)
+    return follow_up
+
+
+def _backoff(attempts):
+    delay = min(settings.QUOTE_OUTBOX_BACKOFF * 2 ** (attempts - 1), settings.QUOTE_OUTBOX_MAX_BACKOFF)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _due():
+    now = timezone.now()
+    return (
+        QuoteOutbox.objects
+        .filter(status__in=[QuoteOutbox.PENDING, QuoteOutbox.SENDING], next_attempt_at__lte=now)
+        .filter(Q(parent__isnull=True) | Q(parent__quote_id__isnull=False))
+        .select_related('parent')
+        .order_by('id')
+    )
+
+
+def _claim(message):
+    lease = timezone.now() + timedelta(seconds=settings.QUOTE_OUTBOX_LEASE)
+    claimed = QuoteOutbox.objects.filter(
+        pk=message.pk, attempts=message.attempts,
+        status__in=[QuoteOutbox.PENDING, QuoteOutbox.SENDING],
+    ).update(status=QuoteOutbox.SENDING, attempts=F('attempts') + 1, next_attempt_at=lease)
+    if claimed:
+        message.attempts += 1
+    return bool(claimed)
+
+
+def _send(message):
+    payload = message.payload
+    path = PATHS[message.kind]
+    if message.parent is not None:
+        payload = dict(payload, QuoteID=message.parent.quote_id)
+        path = path.format(quote_id=message.parent.quote_id)
+    response = catalog.post(path, json=payload, headers={'Idempotency-Key': str(message.key)})
+    response.raise_for_status()
+    return response
+
+
+def deliver(message):
+    """
+    Sends one claimed row and records the outcome.
+
+    Returns:
+        bool: Whether the row was delivered.
+    """
+    try:
+        response = _send(message)
+        if message.kind == QuoteOutbox.QUOTE:
+            message.quote_id = response.json()['QuoteID']
+    except (requests.RequestException, ValueError, KeyError) as e:
+        status = getattr(getattr(e, 'response', None), 'status_code', None)
+        if status in PERMANENT_STATUSES or message.attempts >= settings.QUOTE_OUTBOX_MAX_ATTEMPTS:
+            # Kept for the admin to inspect and retry by hand
+            message.status = QuoteOutbox.FAILED
+        else:
+            message.status = QuoteOutbox.PENDING
+            message.next_attempt_at = timezone.now() + _backoff(message.attempts)
+        message.last_error = f"{type(e).__name__}: {e}"
+        with transaction.atomic():
+            message.save(update_fields=['status', 'next_attempt_at', 'last_error'])
+            if message.status == QuoteOutbox.FAILED:
+                # Follow-ups wait for a QuoteID that will now never come
+                message.follow_ups.filter(status=QuoteOutbox.PENDING).update(
+                    status=QuoteOutbox.FAILED, last_error=f"Quote {message.key} was not delivered",
+                )
+        return False
+
+    message.status = QuoteOutbox.DELIVERED
+    message.delivered_at = timezone.now()
+    message.last_error = ''
+    message.save(update_fields=['status', 'quote_id', 'delivered_at', 'last_error'])
+    return True
+
+
+def deliver_due(limit=100):
+    """
+    Delivers due rows until none are left or ``limit`` have been tried.
+    Follow-ups become due as soon as their quote is delivered, so they go
+    out in the same pass.
+
+    Returns:
+        tuple: Numbers of rows delivered and rows that failed this pass.
+    """
+    delivered = failed = 0
+    while delivered + failed < limit:
+        tried = 0
+        for message in _due()[:limit - delivered - failed]:
+            # Claimed one at a time so a slow upstream cannot outlast the lease
+            # of rows still waiting in this batch
+            if not _claim(message):
+                continue
+            tried += 1
+            if deliver(message):
+                delivered += 1
+            else:
+                failed += 1
+        if not tried:
+            break
+    return delivered, failed
+
+
+def _deliver_in_background():
+    _scheduled.clear()
+    try:
+        deliver_due()
+    finally:
+        connection.close()
+
+
+def schedule_delivery():
+    """
+    Starts a delivery pass on this worker's background thread, unless one is
+    already queued.
+    """
+    global _executor, _executor_pid
+    with _executor_lock:
+        pid = os.getpid()
+        if _executor is None or _executor_pid != pid:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='quote-outbox')
+            _executor_pid = pid
+            _scheduled.clear()
+        if _scheduled.is_set():
+            return
+        _scheduled.set()
+    _executor.submit(_deliver_in_background)
@@ -0,0 +1,156 @@
+# industrialpartner/search.py
+"""
+Full-text part number and description search over the catalog mirror.
+
+Mirrored items are indexed in an SQLite FTS5 table (see migration
+0006_catalog_search_index) next to a normalized copy of their part number,
+so "6ES7-214", "6es7 214" and "6ES7214" all find the same parts.  Results are
+ranked with bm25, exact normalized part number matches first, and returned
+in the same JSON shape as the catalog API's ``/items`` listing.
+"""
+
+import math
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from .models import CatalogItem
+
+TABLE = 'industrialpartner_catalogsearch'
+
+# bm25 weights for part_number, part_number_clean, description, manufacturer
+RANK = f"bm25({TABLE}, 5.0, 10.0, 1.0, 2.0)"
+
+_separators = re.compile(r'[^0-9A-Za-z]+')
+_tokens = re.compile(r'[0-9A-Za-z]+')
+
+
+def normalize_part_number(value):
+    """
+    Upper-cases a part number and strips dashes, spaces, slashes and any
+    other separators, e.g. ``6es7-214 1ag40/0xb0`` becomes ``6ES72141AG400XB0``.
+    """
+    return _separators.sub('', value or '').upper()
+
+
+def _match_expression(query):
+    clean = normalize_part_number(query)
+    if not clean:
+        return None
+    # The whole query as a normalized part number prefix, or all of its words
+    # in any order across every column
+    words = ' AND '.join(f'"{token}"*' for token in _tokens.findall(query))
+    return f'part_number_clean : "{clean}"* OR ({words})'
+
+
+def _rows(items):
+    for item in items:
+        part_number = item.get('PartNumber') or ''
+        yield (
+            item['ItemID'],
+            part_number,
+            normalize_part_number(part_number),
+            item.get('Description') or '',
+            (item.get('Manufacturer') or {}).get('Manufacturer') or '',
+        )
+
+
+def index_items(items):
+    """
+    Adds or replaces item payloads in the search index.
+    """
+    rows = list(_rows(items))
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, part_number, part_number_clean, description, manufacturer) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def remove_items(item_ids):
+    """
+    Drops items from the search index.
+    """
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(item_id,) for item_id in item_ids])
+
+
+@transaction.atomic
+def rebuild_index(batch_size=2000):
+    """
+    Re-indexes every mirrored item and returns the number indexed.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+    count = 0
+    batch = []
+    for payload in CatalogItem.objects.order_by('ItemID').values_list('payload', flat=True).iterator():
+        batch.append(payload)
+        if len(batch) >= batch_size:
+            index_items(batch)
+            count += len(batch)
+            batch = []
+    index_items(batch)
+    return count + len(batch)
+
+
+def is_available():
+    if not settings.CATALOG_LOCAL_SEARCH:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT 1 FROM {TABLE} LIMIT 1")
+        return cursor.fetchone() is not None
+
+
+def narrow(queryset, query):
+    """
+    Narrows a CatalogItem queryset to the items the index matches for
+    ``query``, the same way ``search`` finds them.
+    """
+    expression = _match_expression(query)
+    if expression is None:
+        return queryset.none()
+    return queryset.filter(
+        ItemID__in=RawSQL(f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s", [expression])
+    )
+
+
+def search(query, page=1):
+    """
+    Searches the index and returns a page of results shaped like the API's
+    ``/items`` response.
+    """
+    size = settings.CATALOG_MIRROR_PAGE_SIZE
+    try:
+        page = max(int(page), 1)
+    except (TypeError, ValueError):
+        page = 1
+    result = {'items': [], 'total': 0, 'page': page, 'size': size, 'pages': 0}
+
+    expression = _match_expression(query)
+    if expression is None:
+        return result
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s", [expression])
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s "
+            f"ORDER BY part_number_clean = %s DESC, {RANK} LIMIT %s OFFSET %s",
+            [expression, normalize_part_number(query), size, (page - 1) * size],
+        )
+        item_ids = [row[0] for row in cursor.fetchall()]
+
+    payloads = dict(CatalogItem.objects.filter(ItemID__in=item_ids).values_list('ItemID', 'payload'))
+    result.update(
+        items=[payloads[item_id] for item_id in item_ids if item_id in payloads],
+        total=total,
+        pages=math.ceil(total / size),
+    )
+    return result
@@ -0,0 +1,188 @@
+# industrialpartner/session_backends.py
+"""
+Session engine that keeps sessions in the shared cache.
+
+Sessions are read from ``settings.SESSION_CACHE_ALIAS`` and only fall back to
+the database when the cache has lost them.  How they reach the database
+depends on ``settings.SESSION_WRITE_MODE``:
+
+``'through'``
+    Every save writes the database row and then the cache, like Django's
+    cached_db engine.
+``'behind'``
+    A save only writes the cache; the row is queued and a background thread
+    of the worker writes all queued rows in one transaction every
+    ``SESSION_WRITE_BEHIND_INTERVAL`` seconds (and when the worker exits).
+    Concurrent requests then no longer queue up on the SQLite write lock.
+    A worker that dies hard loses at most that interval of database writes,
+    which only matters if the cache loses the session as well.
+
+In both modes a session that was marked modified but holds exactly what was
+loaded (a cart written back unchanged, a message added and read in the same
+request) is not saved at all.
+
+Expired rows are removed by ``SessionStore.clear_expired``, which the
+purge_sessions management command runs periodically.
+
+    SESSION_ENGINE = 'industrialpartner.session_backends'
+"""
+
+import atexit
+import hashlib
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+WRITE_THROUGH = 'through'
+WRITE_BEHIND = 'behind'
+
+# Session key -> (encoded data, expire date), or None for a deleted session
+_pending = {}
+_pending_lock = threading.Lock()
+_flusher_pid = None
+
+
+class SessionStore(CachedDBStore):
+    _loaded_digest = None
+
+    def _digest(self, data):
+        return hashlib.sha1(self.serializer().dumps(data)).digest()
+
+    def load(self):
+        data = super().load()
+        self._loaded_digest = self._digest(data)
+        return data
+
+    def _unchanged(self, data):
+        # With SESSION_SAVE_EVERY_REQUEST the save is what extends the expiry
+        return not settings.SESSION_SAVE_EVERY_REQUEST and self._loaded_digest == self._digest(data)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if not must_create and self._unchanged(data):
+            return
+
+        if settings.SESSION_WRITE_MODE == WRITE_BEHIND:
+            timeout = self.get_expiry_age()
+            if must_create:
+                if not self._cache.add(self.cache_key, data, timeout):
+                    raise CreateError
+            else:
+                self._cache.set(self.cache_key, data, timeout)
+            _queue(self.session_key, (self.encode(data), self.get_expiry_date()))
+        else:
+            super().save(must_create)
+        self._loaded_digest = self._digest(data)
+
+    def delete(self, session_key=None):
+        if settings.SESSION_WRITE_MODE != WRITE_BEHIND:
+            return super().delete(session_key)
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self._cache.delete(self.cache_key_prefix + session_key)
+        # Queued too, so a write still pending for this session cannot
+        # bring the row back
+        _queue(session_key, None)
+
+    @classmethod
+    def clear_expired(cls):
+        """
+        Deletes expired session rows in batches of
+        ``settings.SESSION_PURGE_BATCH_SIZE``, so the write lock is never held
+        for long.  Cached copies expire on their own.
+
+        Returns:
+            int: The number of rows deleted.
+        """
+        model = cls.get_model_class()
+        deleted = 0
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=timezone.now())
+                .values_list('session_key', flat=True)[:settings.SESSION_PURGE_BATCH_SIZE]
+            )
+            if not keys:
+                return deleted
+            deleted += model.objects.filter(session_key__in=keys).delete()[0]
+
+
+def _queue(session_key, entry):
+    global _flusher_pid
+    with _pending_lock:
+        if _flusher_pid != os.getpid():
+            # First write in this process (or a forked worker, whose copy of
+            # the parent's queue is the parent's to write)
+            _pending.clear()
+            _flusher_pid = os.getpid()
+            threading.Thread(target=_flush_loop, name='session-write-behind', daemon=True).start()
+        _pending[session_key] = entry
+
+
+def flush_pending():
+    """
+    Writes the queued sessions of this worker to the database in one
+    transaction.
+
+    Returns:
+        int: The number of sessions written or deleted.
+    """
+    with _pending_lock:
+        batch = dict(_pending)
+        _pending.clear()
+    if not batch:
+        return 0
+
+    model = SessionStore.get_model_class()
+    rows = [
+        model(session_key=session_key, session_data=entry[0], expire_date=entry[1])
+        for session_key, entry in batch.items() if entry is not None
+    ]
+    deleted = [session_key for session_key, entry in batch.items() if entry is None]
+    try:
+        with transaction.atomic():
+            if deleted:
+                model.objects.filter(session_key__in=deleted).delete()
+            if rows:
+                model.objects.bulk_create(
+                    rows, update_conflicts=True,
+                    unique_fields=['session_key'], update_fields=['session_data', 'expire_date'],
+                )
+    except DatabaseError:
+        # Requeue for the next round, unless a newer write came in meanwhile
+        with _pending_lock:
+            for session_key, entry in batch.items():
+                _pending.setdefault(session_key, entry)
+        raise
+    return len(batch)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(settings.SESSION_WRITE_BEHIND_INTERVAL)
+        if not _pending:
+            continue
+        try:
+            flush_pending()
+        except DatabaseError:
+            pass
+        finally:
+            connection.close()
+
+
+@atexit.register
+def _flush_at_exit():
+    if _flusher_pid == os.getpid():
+        try:
+            flush_pending()
+        except DatabaseError:
+            pass
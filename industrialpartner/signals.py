@@ -0,0 +1,26 @@
+# industrialpartner/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import featured, images
+from .models import Product
+
+
+@receiver(post_save, sender=Product)
+def make_image_derivatives(sender, instance, **kwargs):
+    # Existing derivatives are kept, so this only does work for new uploads
+    for field in (instance.image1, instance.image2):
+        if not field:
+            continue
+        try:
+            images.generate_derivatives(field.name)
+        except OSError:
+            # Missing or unreadable file; the page falls back to the original
+            pass
+    images.record_derivatives(instance)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_featured_products(sender, **kwargs):
+    featured.invalidate()
@@ -0,0 +1,73 @@
+# industrialpartner/singleflight.py
+"""
+In-process request coalescing.
+
+``do(key, fn)`` runs ``fn`` once for all callers that ask for the same key
+while it is in flight; the others wait and share its result or exception.
+``ado`` does the same for coroutine functions on the running event loop.
+Coalescing across worker processes is done by the catalog client on top of
+this with a lock entry in the shared cache.
+"""
+
+import asyncio
+import threading
+import weakref
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+# Per event loop: key -> task
+_async_flights = weakref.WeakKeyDictionary()
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def do(key, fn):
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = fn()
+        return flight.result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def _retrieve(task):
+    # Keeps asyncio from warning about an exception nobody waited for
+    if not task.cancelled():
+        task.exception()
+
+
+async def ado(key, fn):
+    loop = asyncio.get_running_loop()
+    flights = _async_flights.setdefault(loop, {})
+    task = flights.get(key)
+    if task is None:
+        # The fetch runs as its own task, so a caller that goes away (client
+        # disconnect) does not cancel it for everyone else
+        task = flights[key] = asyncio.ensure_future(fn())
+        task.add_done_callback(lambda t: flights.pop(key, None))
+        task.add_done_callback(_retrieve)
+    return await asyncio.shield(task)
@@ -0,0 +1,140 @@
+# industrialpartner/sitemaps.py
+"""
+Offline XML sitemaps for every product page.
+
+``write_sitemaps`` streams product URLs into gzipped shards of at most
+``MAX_URLS`` URLs each plus a sitemap index (see the build_sitemaps management
+command).  The files are served as they are by the sitemap_file view, so
+crawlers never cause a catalog API request.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from django.urls import NoReverseMatch, reverse
+
+from . import catalog
+from .models import CatalogItem
+
+# Per-file limit of the sitemap protocol
+MAX_URLS = 50000
+
+INDEX_NAME = 'sitemap.xml'
+SHARD_NAME = 'sitemap-products-{}.xml.gz'
+
+# Site pages listed ahead of the products
+PAGES = ['home', 'all_product', 'about', 'contact']
+
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def mirror_products():
+    """
+    Yields (item_id, slug) for every mirrored item.
+    """
+    yield from CatalogItem.objects.order_by('ItemID').values_list('ItemID', 'Slug').iterator(chunk_size=5000)
+
+
+def api_products():
+    """
+    Yields (item_id, slug) for every item by paging through ``/items``.
+    """
+    page = pages = 1
+    while page <= pages:
+        response = catalog.get('/items', {'page': page})
+        response.raise_for_status()
+        data = response.json()
+        pages = data.get('pages') or 1
+        for item in data.get('items', []):
+            yield item['ItemID'], item.get('Slug') or ''
+        page += 1
+
+
+def site_paths(products):
+    for name in PAGES:
+        yield reverse(name)
+    for item_id, slug in products:
+        try:
+            yield reverse('product', args=[item_id, slug])
+        except NoReverseMatch:
+            # The product view cannot be reached without a valid slug
+            continue
+
+
+def _write_shard(path, urls):
+    count = 0
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{XMLNS}">\n')
+        for url in urls:
+            f.write(f'<url><loc>{escape(url)}</loc></url>\n')
+            count += 1
+        f.write('</urlset>\n')
+    return count
+
+
+def _write_index(path, shard_urls):
+    content = (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{XMLNS}">\n'
+        + ''.join(f'<sitemap><loc>{escape(url)}</loc></sitemap>\n' for url in shard_urls)
+        + '</sitemapindex>\n'
+    ).encode()
+    with open(path, 'wb') as f:
+        f.write(content)
+    with gzip.open(path + '.gz', 'wb') as f:
+        f.write(content)
+
+
+def write_sitemaps(products, root, base_url):
+    """
+    Writes the product sitemap shards and the sitemap index into ``root``.
+
+    Files are built in a temporary directory and moved into place one by one,
+    so the served index never points at a missing shard.
+
+    Returns:
+        tuple: The number of URLs and the number of shards written.
+    """
+    base_url = base_url.rstrip('/')
+    os.makedirs(root, exist_ok=True)
+    build = tempfile.mkdtemp(prefix='.build-', dir=root)
+    try:
+        count = 0
+        shards = []
+        urls = (base_url + path for path in site_paths(products))
+        while True:
+            name = SHARD_NAME.format(len(shards) + 1)
+            written = _write_shard(os.path.join(build, name), islice(urls, MAX_URLS))
+            if not written:
+                break
+            shards.append(name)
+            count += written
+            if written < MAX_URLS:
+                break
+
+        shard_urls = [base_url + reverse('sitemap_file', args=[name]) for name in shards]
+        _write_index(os.path.join(build, INDEX_NAME), shard_urls)
+
+        for name in shards + [INDEX_NAME + '.gz', INDEX_NAME]:
+            os.replace(os.path.join(build, name), os.path.join(root, name))
+        # Drop shards left over from a larger catalog
+        for name in os.listdir(root):
+            if name.startswith('sitemap-products-') and name not in shards:
+                os.remove(os.path.join(root, name))
+    finally:
+        shutil.rmtree(build, ignore_errors=True)
+    return count, len(shards)
+
+
+def products(source='auto'):
+    """
+    Returns the product iterator for ``source``: 'mirror', 'api', or 'auto'
+    for the mirror when it is populated and the API otherwise.
+    """
+    if source == 'auto':
+        source = 'mirror' if CatalogItem.objects.exists() else 'api'
+    return mirror_products() if source == 'mirror' else api_products()
+
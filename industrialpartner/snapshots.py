@@ -0,0 +1,201 @@
+# industrialpartner/snapshots.py
+"""
+Pre-rendered HTML snapshots of the busiest pages.
+
+The prerender_pages management command picks the hottest URLs from a
+traffic list or an access log, renders each one through the full request
+stack (so the page is exactly what a visitor would get) and stores the HTML,
+plus a gzipped copy, under ``settings.PRERENDER_ROOT``.  While a snapshot is
+younger than ``settings.PRERENDER_MAX_AGE``, ``SnapshotMiddleware`` answers
+the URL from disk without running a view or calling the catalog.
+
+Only pages that are the same for every visitor are snapshotted: views named
+in ``settings.PRERENDER_URL_NAMES``, answered with a 200 that was not built
+from stale catalog data and does not set cookies.
+"""
+
+import gzip
+import hashlib
+import io
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import Resolver404, resolve
+
+# Sent with render requests so the middleware does not answer them from the
+# snapshot being replaced
+BYPASS_HEADER = 'X-Prerender'
+
+CONTENT_TYPE = 'text/html; charset=utf-8'
+
+# Request line and status of a common/combined log format entry (nginx,
+# Apache, gunicorn)
+LOG_LINE = re.compile(r'"(?:GET|HEAD) (\S+) HTTP/[\d.]+" (\d{3}) ')
+
+
+def normalize_host(host):
+    return (host or '').split(':')[0].strip().lower()
+
+
+def snapshot_path(host, full_path):
+    """
+    Returns where the snapshot of ``full_path`` (path plus query string) on
+    ``host`` is stored.
+    """
+    digest = hashlib.sha1(full_path.encode()).hexdigest()
+    return os.path.join(settings.PRERENDER_ROOT, normalize_host(host), f"{digest}.html")
+
+
+def fresh_snapshot(request):
+    """
+    Returns the path of a fresh snapshot for ``request``, or None.
+    """
+    path = snapshot_path(request.get_host(), request.get_full_path())
+    try:
+        modified = os.stat(path).st_mtime
+    except (OSError, ValueError):
+        return None
+    return path if time.time() - modified < settings.PRERENDER_MAX_AGE else None
+
+
+def is_prerenderable(path):
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return False
+    return match.url_name in settings.PRERENDER_URL_NAMES
+
+
+def _split(url, default_host):
+    parts = urlsplit(url if '://' in url else f"//{default_host}{url}" if url.startswith('/') else f"//{url}")
+    full_path = parts.path or '/'
+    if parts.query:
+        full_path += f"?{parts.query}"
+    return normalize_host(parts.netloc or default_host), full_path
+
+
+def urls_from_list(lines, default_host):
+    """
+    Counts a traffic list: one URL or path per line, optionally preceded by
+    its hit count (``1532 https://siemens.industrialpartner.com/``).
+    """
+    hits = Counter()
+    for line in lines:
+        fields = line.split()
+        if not fields or fields[0].startswith('#'):
+            continue
+        count = int(fields[0]) if len(fields) > 1 and fields[0].isdigit() else 1
+        hits[_split(fields[-1], default_host)] += count
+    return hits
+
+
+def urls_from_log(lines, default_host):
+    """
+    Counts successful GETs in an access log.  Common/combined logs do not
+    record the host, so every path is counted under ``default_host``.
+    """
+    hits = Counter()
+    for line in lines:
+        match = LOG_LINE.search(line)
+        if match and match.group(2) == '200':
+            hits[_split(match.group(1), default_host)] += 1
+    return hits
+
+
+def hottest(hits, limit):
+    """
+    Returns the ``limit`` most requested prerenderable ``(host, full_path)``
+    pairs.
+    """
+    return [
+        url for url, _ in hits.most_common()
+        if is_prerenderable(urlsplit(url[1]).path)
+    ][:limit]
+
+
+_handler = None
+
+
+def render(host, full_path):
+    """
+    Renders a URL through the WSGI handler.
+
+    Returns:
+        tuple: Status code, response headers (dict) and body.
+    """
+    global _handler
+    if _handler is None:
+        _handler = WSGIHandler()
+    parts = urlsplit(full_path)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'SERVER_NAME': host,
+        'SERVER_PORT': '443',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host,
+        'HTTP_' + BYPASS_HEADER.upper().replace('-', '_'): '1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'https',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split()[0])
+        started['headers'] = headers
+
+    result = _handler(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    headers = {}
+    for name, value in started['headers']:
+        headers.setdefault(name.lower(), []).append(value)
+    return started['status'], headers, body
+
+
+def _write(path, data):
+    # Written next to the target and renamed, so readers never see half a file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def prerender(host, full_path):
+    """
+    Renders one URL and stores its snapshot.
+
+    Returns:
+        bool: Whether a snapshot was written; pages that are not a plain 200,
+        were built from stale data or set cookies are skipped.
+    """
+    status, headers, body = render(host, full_path)
+    if status != 200 or 'x-catalog-stale' in headers or 'set-cookie' in headers:
+        return False
+    if not headers.get('content-type', [''])[0].startswith('text/html'):
+        return False
+    path = snapshot_path(host, full_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # The compressed copy goes first: the middleware keys freshness off the
+    # plain file, so it is never newer than its .gz
+    _write(path + '.gz', gzip.compress(body, compresslevel=9, mtime=0))
+    _write(path, body)
+    return True
@@ -0,0 +1,51 @@
+// Part number autocomplete for search inputs marked with data-typeahead-url.
+// Suggestions come from /search/suggest/ and are shown through a <datalist>;
+// requests are debounced and answers are remembered per prefix.
+(function () {
+    var DELAY = 120;
+
+    function attach(input) {
+        var list = document.getElementById(input.getAttribute('list'));
+        var url = input.getAttribute('data-typeahead-url');
+        var answers = {};
+        var timer = null;
+        var latest = '';
+
+        function show(data) {
+            list.innerHTML = '';
+            data.parts.forEach(function (part) {
+                var option = document.createElement('option');
+                option.value = part.part_number;
+                list.appendChild(option);
+            });
+        }
+
+        input.addEventListener('input', function () {
+            var query = input.value.trim();
+            clearTimeout(timer);
+            if (query.length < 2) {
+                list.innerHTML = '';
+                return;
+            }
+            if (answers[query]) {
+                show(answers[query]);
+                return;
+            }
+            timer = setTimeout(function () {
+                latest = query;
+                fetch(url + '?q=' + encodeURIComponent(query))
+                    .then(function (response) { return response.json(); })
+                    .then(function (data) {
+                        answers[query] = data;
+                        // Ignore answers that arrive after a newer keystroke
+                        if (query === latest) {
+                            show(data);
+                        }
+                    })
+                    .catch(function () {});
+            }, DELAY);
+        });
+    }
+
+    document.querySelectorAll('input[data-typeahead-url]').forEach(attach);
+})();
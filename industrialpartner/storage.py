@@ -0,0 +1,63 @@
+# industrialpartner/storage.py
+"""
+Static files storage for collectstatic.
+
+``CompressedManifestStaticFilesStorage`` is Django's manifest storage (every
+file is also written under a content-hashed name such as
+``webflow.1a2b3c4d5e6f.css`` and ``{% static %}`` links to that name) that
+additionally writes a gzipped copy next to every text asset, so the files
+are compressed once at build time rather than on every request.
+"""
+
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+# Extensions worth compressing; images, fonts in woff/woff2 and video are
+# compressed already
+COMPRESSIBLE = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.xml', '.txt', '.html', '.ico', '.ttf', '.otf', '.eot'}
+
+# A gzipped copy is only kept when it saves at least this share of the bytes
+MIN_SAVING = 0.05
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def url(self, name, force=False):
+        if not self.hashed_files:
+            # collectstatic has not run here (e.g. a source checkout mounted
+            # over the image); link to the plain names
+            return FileSystemStorage.url(self, name)
+        return super().url(name, force)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # A template referencing a file that does not exist gets its
+            # plain name (and a 404 for it) instead of a server error
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(paths) | set(self.hashed_files.values()):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        # mtime=0 keeps the output identical across builds
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) > len(data) * (1 - MIN_SAVING):
+            if os.path.exists(path + '.gz'):
+                os.remove(path + '.gz')
+            return
+        with open(path + '.gz', 'wb') as f:
+            f.write(compressed)
@@ -0,0 +1,178 @@
+# industrialpartner/stubcatalog.py
+"""
+Local stand-in for the catalog API, for benchmarks and offline development.
+
+``serve`` answers catalog requests from a fixture file of recorded
+responses instead of the real host.  A fixture file holds a list of
+entries::
+
+    {"responses": [
+        {"method": "GET", "path": "/items/1001", "body": {...}},
+        {"method": "GET", "path": "/items", "params": {"manufacturer_lookup": "SIEMENS"}, "body": {...}},
+        {"method": "POST", "path": "/quotes*", "status": 200, "body": {"QuoteID": 1}}
+    ]}
+
+A request is answered by the entry with its method and path (a glob) whose
+``params`` are all present in the query string with the same values,
+preferring the entry that names the most params, so one entry without
+params answers every query of a path that was not recorded specifically.
+Requests no entry matches get a 404.
+
+Every response can be delayed by ``latency`` plus up to ``jitter`` seconds,
+and a share ``error_rate`` of requests is answered with ``error_status``
+instead, to see how the site behaves while the API is slow or failing.
+
+``record`` builds a fixture file by fetching a list of paths from the real
+API.  The stub_catalog management command runs both.
+"""
+
+import fnmatch
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+DEFAULT_FIXTURES = 'industrialpartner/benchdata/catalog.json'
+
+
+class Fixtures:
+    def __init__(self, responses):
+        self.responses = responses
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f)['responses'])
+
+    def match(self, method, path, params):
+        """
+        Returns the entry answering a request, or None.
+        """
+        best = None
+        for entry in self.responses:
+            if entry.get('method', 'GET') != method or not fnmatch.fnmatchcase(path, entry['path']):
+                continue
+            wanted = entry.get('params', {})
+            if any(params.get(name) != str(value) for name, value in wanted.items()):
+                continue
+            if best is None or len(wanted) > len(best.get('params', {})):
+                best = entry
+        return best
+
+    def items(self):
+        """
+        Returns the recorded item details (``/items/<id>`` bodies).
+        """
+        return [
+            entry['body'] for entry in self.responses
+            if fnmatch.fnmatchcase(entry['path'], '/items/*') and entry.get('status', 200) == 200
+        ]
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once
+    request_queue_size = 128
+
+    def __init__(self, address, fixtures, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503):
+        super().__init__(address, StubHandler)
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.counts = {}
+        self._counts_lock = threading.Lock()
+
+    def count(self, key):
+        with self._counts_lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _answer(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        server = self.server
+        server.count(f"{self.command} {url.path}")
+
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+        if server.error_rate and random.random() < server.error_rate:
+            status, body = server.error_status, {'detail': 'Injected error'}
+        else:
+            entry = server.fixtures.match(self.command, url.path, params)
+            if entry is None:
+                status, body = 404, {'detail': 'Not found'}
+            else:
+                status, body = entry.get('status', 200), entry.get('body', {})
+
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = _answer
+
+
+def serve(fixtures, host='127.0.0.1', port=0, **options):
+    """
+    Starts a stub server in a background thread.
+
+    Args:
+        fixtures (Fixtures): Recorded responses.
+        port (int): Port to listen on; 0 picks a free one.
+        **options: ``latency``, ``jitter`` (seconds), ``error_rate`` and
+            ``error_status``, see ``StubServer``.
+
+    Returns:
+        StubServer: The running server; its URL is ``server.url`` and
+        ``server.shutdown()`` stops it.
+    """
+    server = StubServer((host, port), fixtures, **options)
+    server.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name='stub-catalog', daemon=True).start()
+    return server
+
+
+def record(base_url, paths, timeout=15):
+    """
+    Fetches ``paths`` (path plus query string, e.g. ``/items?page=1``) from
+    the catalog API at ``base_url``.
+
+    Returns:
+        dict: The fixture file contents.
+    """
+    responses = []
+    with requests.Session() as session:
+        for path in paths:
+            url = urlsplit(path)
+            response = session.get(base_url.rstrip('/') + path, timeout=timeout)
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            responses.append({
+                'method': 'GET',
+                'path': url.path,
+                'params': dict(parse_qsl(url.query, keep_blank_values=True)),
+                'status': response.status_code,
+                'body': body,
+            })
+    return {'responses': responses}
@@ -0,0 +1,37 @@
+# industrialpartner/templatetags/responsive_images.py
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from industrialpartner import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, sizes='100vw', alt='', css_class='', loading='lazy'):
+    """
+    Renders an ImageField as a ``<picture>`` whose WebP source lists the
+    image's derivatives in ``srcset``, with the original as the fallback
+    ``<img>``.  Without derivatives it is a plain ``<img>``.
+
+        {% responsive_image product.image1 sizes="(max-width: 767px) 90vw, 300px" alt=product.PartNumber %}
+    """
+    if not image:
+        return ''
+    img = format_html(
+        '<img alt="{}" class="{}" loading="{}" decoding="async" src="{}"/>',
+        alt, css_class, loading, image.url,
+    )
+    # Recorded when the derivatives were made; nothing is read from storage
+    record = getattr(image.instance, 'image_derivatives', None) or {}
+    widths = record.get(image.name, {}).get('widths')
+    if not widths:
+        return img
+    srcset = format_html_join(', ', '{} {}w', (
+        (default_storage.url(images.derivative_name(image.name, width)), width) for width in widths
+    ))
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}"/>{}</picture>',
+        srcset, sizes, img,
+    )
@@ -1,3 +1,413 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import requests
+
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import catalog, hedging, outbox
+from .breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from .cache_backends import SQLiteCache
+from .models import QuoteOutbox
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options, 'TIMEOUT': 300})
+
+    def test_set_get_delete(self):
+        cache = self.make_cache()
+        cache.set('key', {'a': 1})
+        self.assertEqual(cache.get('key'), {'a': 1})
+        self.assertTrue(cache.delete('key'))
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.get('key', 'default'), 'default')
+
+    def test_entries_expire(self):
+        cache = self.make_cache()
+        with mock.patch('time.time', return_value=1000.0):
+            cache.set('key', 'value', timeout=10)
+            self.assertTrue(cache.add('other', 'value', timeout=10))
+            self.assertFalse(cache.add('other', 'again', timeout=10))
+        with mock.patch('time.time', return_value=1011.0):
+            self.assertIsNone(cache.get('key'))
+            self.assertFalse(cache.has_key('key'))
+            # An expired entry no longer blocks add()
+            self.assertTrue(cache.add('other', 'again', timeout=10))
+            self.assertEqual(cache.get('other'), 'again')
+
+    def test_incr(self):
+        cache = self.make_cache()
+        cache.set('counter', 1)
+        self.assertEqual(cache.incr('counter', 2), 3)
+        self.assertEqual(cache.get('counter'), 3)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+    def test_cull_evicts_least_recently_used(self):
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        for offset, key in enumerate('abc'):
+            with mock.patch('time.time', return_value=1000.0 + offset):
+                cache.set(key, key)
+        # A hit on 'a' is queued and written with the next set, before culling
+        with mock.patch('time.time', return_value=1100.0):
+            self.assertEqual(cache.get('a'), 'a')
+        with mock.patch('time.time', return_value=1101.0):
+            cache.set('d', 'd')
+            self.assertEqual(cache.get_many(['a', 'b', 'c', 'd']), {'a': 'a', 'c': 'c', 'd': 'd'})
+
+    def test_cull_by_size(self):
+        cache = self.make_cache(MAX_SIZE=5000, CULL_FREQUENCY=2)
+        for n in range(10):
+            with mock.patch('time.time', return_value=1000.0 + n):
+                cache.set(f"key{n}", 'x' * 1000)
+        size, = sqlite3.connect(self.path).execute('SELECT bytes FROM cache_stats').fetchone()
+        self.assertLessEqual(size, 5000)
+        with mock.patch('time.time', return_value=1010.0):
+            self.assertIsNotNone(cache.get('key9'))
+            self.assertIsNone(cache.get('key0'))
+
+    def test_hit_does_not_wait_for_the_write_lock(self):
+        cache = self.make_cache(BUSY_TIMEOUT=5)
+        with mock.patch('time.time', return_value=1000.0):
+            cache.set('key', 'value', timeout=None)
+        writer = sqlite3.connect(self.path, isolation_level=None)
+        writer.execute('BEGIN IMMEDIATE')
+        try:
+            started = time.monotonic()
+            # Old enough for an LRU bump
+            with mock.patch('time.time', return_value=2000.0):
+                self.assertEqual(cache.get('key'), 'value')
+            self.assertLess(time.monotonic() - started, 1)
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
+
+
+
+@override_settings(
+    CATALOG_BREAKER_WINDOW=10, CATALOG_BREAKER_MIN_CALLS=4, CATALOG_BREAKER_FAILURE_RATE=0.5,
+    CATALOG_BREAKER_SLOW_CALL=1.0, CATALOG_BREAKER_RESET_TIMEOUT=30,
+)
+class CircuitBreakerTests(SimpleTestCase):
+    def open_breaker(self, breaker):
+        for _ in range(4):
+            breaker.record(False, 0.1)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_stays_closed_until_enough_calls_fail(self):
+        breaker = CircuitBreaker('item')
+        for _ in range(3):
+            breaker.record(False, 0.1)
+        # Fewer than CATALOG_BREAKER_MIN_CALLS calls seen
+        self.assertTrue(breaker.is_closed)
+
+        breaker = CircuitBreaker('item')
+        for _ in range(4):
+            breaker.record(True, 0.1)
+        for _ in range(3):
+            breaker.record(False, 0.1)
+        # 3 of 7 failed, below CATALOG_BREAKER_FAILURE_RATE
+        self.assertTrue(breaker.is_closed)
+        breaker.record(False, 0.1)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker('item')
+        for _ in range(4):
+            breaker.record(True, 2.0)
+        self.assertEqual(breaker.state, OPEN)
+
+    @mock.patch('industrialpartner.breaker.time.monotonic')
+    def test_open_circuit_lets_one_probe_through_after_the_timeout(self, monotonic):
+        monotonic.return_value = 100.0
+        breaker = CircuitBreaker('item')
+        self.open_breaker(breaker)
+        self.assertFalse(breaker.allow())
+        monotonic.return_value = 131.0
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record(True, 0.1)
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertTrue(breaker.allow())
+
+    @mock.patch('industrialpartner.breaker.time.monotonic')
+    def test_failed_probe_opens_the_circuit_again(self, monotonic):
+        monotonic.return_value = 100.0
+        breaker = CircuitBreaker('item')
+        self.open_breaker(breaker)
+        monotonic.return_value = 131.0
+        self.assertTrue(breaker.allow())
+        breaker.record(False, 0.1)
+        self.assertEqual(breaker.state, OPEN)
+        monotonic.return_value = 150.0
+        self.assertFalse(breaker.allow())
+
+    @mock.patch('industrialpartner.breaker.time.monotonic')
+    def test_cancelled_probe_frees_the_slot(self, monotonic):
+        monotonic.return_value = 100.0
+        breaker = CircuitBreaker('item')
+        self.open_breaker(breaker)
+        monotonic.return_value = 131.0
+        self.assertTrue(breaker.allow())
+        breaker.cancel()
+        self.assertTrue(breaker.allow())
+
+    def test_client_fails_fast_while_open(self):
+        breaker = CircuitBreaker('item')
+        self.open_breaker(breaker)
+        with mock.patch('industrialpartner.catalog.get_breaker', return_value=breaker), \
+                mock.patch('industrialpartner.catalog.get_session') as get_session:
+            with self.assertRaises(CircuitOpenError):
+                catalog.get('/items/42')
+        get_session.assert_not_called()
+
+
+
+
+@override_settings(
+    CATALOG_HEDGE=True, CATALOG_HEDGE_FAMILIES=('item',), CATALOG_HEDGE_MIN_SAMPLES=1,
+    CATALOG_HEDGE_MIN_DELAY=0.02, CATALOG_HEDGE_BURST=10, CATALOG_HEDGE_BUDGET=0.05,
+)
+class HedgingTests(SimpleTestCase):
+    def setUp(self):
+        # Fresh latency trackers, budget, breaker and counters for every test
+        for patcher in (
+            mock.patch.dict(hedging._trackers, clear=True),
+            mock.patch.object(hedging, '_budget', None),
+            mock.patch.object(hedging, '_stats', {'requests': 0, 'hedged': 0, 'hedge_wins': 0}),
+            mock.patch('industrialpartner.hedging.get_breaker', return_value=CircuitBreaker('item')),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        hedging.get_tracker('item').record(0.05)
+        self.primary_done = threading.Event()
+        self.addCleanup(self.primary_done.set)
+
+    def slow_then_fast(self):
+        calls = []
+        lock = threading.Lock()
+
+        def attempt():
+            with lock:
+                calls.append(None)
+                first = len(calls) == 1
+            if first:
+                # The first attempt only answers once the test lets it
+                self.primary_done.wait(5)
+                return 'primary'
+            return 'hedge'
+        return attempt
+
+    def test_fast_hedge_beats_slow_primary(self):
+        started = time.monotonic()
+        self.assertEqual(hedging.call('item', self.slow_then_fast()), 'hedge')
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertFalse(self.primary_done.is_set())
+        self.assertEqual(hedging.stats(), {'requests': 1, 'hedged': 1, 'hedge_wins': 1})
+
+    def test_fast_primary_is_not_hedged(self):
+        self.assertEqual(hedging.call('item', lambda: 'primary'), 'primary')
+        self.assertEqual(hedging.stats()['hedged'], 0)
+
+    def test_failed_primary_falls_back_to_the_hedge(self):
+        calls = []
+
+        def attempt():
+            calls.append(None)
+            if len(calls) == 1:
+                time.sleep(0.1)
+                raise requests.ConnectionError('reset')
+            time.sleep(0.2)
+            return 'hedge'
+        self.assertEqual(hedging.call('item', attempt), 'hedge')
+
+    def test_no_hedge_without_budget(self):
+        attempt = self.slow_then_fast()
+        threading.Timer(0.2, self.primary_done.set).start()
+        with override_settings(CATALOG_HEDGE_BURST=0):
+            self.assertEqual(hedging.call('item', attempt), 'primary')
+        self.assertEqual(hedging.stats()['hedged'], 0)
+
+
+def api_response(status, data=None):
+    response = requests.Response()
+    response.status_code = status
+    response.url = 'http://catalog.test/'
+    response._content = json.dumps(data or {}).encode()
+    return response
+
+
+@override_settings(QUOTE_OUTBOX_MAX_ATTEMPTS=3)
+class QuoteOutboxTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch('industrialpartner.outbox.catalog.post')
+        self.post = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_due(self, message):
+        QuoteOutbox.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+    def test_quote_and_follow_up_are_delivered_in_one_pass(self):
+        quote = outbox.enqueue_quote({'Company': 'ACME'}, request_info={'Notes': 'Urgent'})
+        self.post.side_effect = [api_response(201, {'QuoteID': 77}), api_response(201)]
+        self.assertEqual(outbox.deliver_due(), (2, 0))
+
+        quote.refresh_from_db()
+        self.assertEqual((quote.status, quote.quote_id), (QuoteOutbox.DELIVERED, 77))
+        follow_up = quote.follow_ups.get()
+        self.assertEqual(follow_up.status, QuoteOutbox.DELIVERED)
+        (path, ), kwargs = self.post.call_args
+        self.assertEqual(path, '/quotes/request-info/77')
+        self.assertEqual(kwargs['json'], {'Notes': 'Urgent', 'QuoteID': 77})
+        self.assertEqual(kwargs['headers'], {'Idempotency-Key': str(follow_up.key)})
+
+    def test_follow_up_waits_for_its_quote(self):
+        quote = outbox.enqueue_quote({'Company': 'ACME'}, request_info={'Notes': 'Urgent'})
+        self.post.return_value = api_response(503)
+        self.assertEqual(outbox.deliver_due(), (0, 1))
+        self.assertEqual(self.post.call_count, 1)
+        self.assertEqual(quote.follow_ups.get().attempts, 0)
+
+    def test_failed_delivery_is_retried_with_the_same_key(self):
+        quote = outbox.enqueue_quote({'Company': 'ACME'})
+        self.post.side_effect = requests.ConnectionError('connection reset')
+        self.assertEqual(outbox.deliver_due(), (0, 1))
+        quote.refresh_from_db()
+        self.assertEqual((quote.status, quote.attempts), (QuoteOutbox.PENDING, 1))
+        self.assertGreater(quote.next_attempt_at, timezone.now())
+        self.assertIn('connection reset', quote.last_error)
+        # Not due again until the backoff has passed
+        self.assertEqual(outbox.deliver_due(), (0, 0))
+
+        self.make_due(quote)
+        self.post.side_effect = [api_response(201, {'QuoteID': 5})]
+        self.assertEqual(outbox.deliver_due(), (1, 0))
+        keys = {call.kwargs['headers']['Idempotency-Key'] for call in self.post.call_args_list}
+        self.assertEqual(keys, {str(quote.key)})
+
+    def test_permanent_errors_are_not_retried(self):
+        quote = outbox.enqueue_quote({'Company': 'ACME'})
+        self.post.return_value = api_response(422)
+        outbox.deliver_due()
+        quote.refresh_from_db()
+        self.assertEqual(quote.status, QuoteOutbox.FAILED)
+
+    def test_gives_up_after_max_attempts(self):
+        quote = outbox.enqueue_quote({'Company': 'ACME'})
+        self.post.return_value = api_response(503)
+        for _ in range(3):
+            self.make_due(quote)
+            outbox.deliver_due()
+        quote.refresh_from_db()
+        self.assertEqual((quote.status, quote.attempts), (QuoteOutbox.FAILED, 3))
+        self.make_due(quote)
+        self.assertEqual(outbox.deliver_due(), (0, 0))
+
+    def test_follow_ups_fail_with_their_quote(self):
+        quote = outbox.enqueue_quote({'Company': 'ACME'}, request_info={'Notes': 'Urgent'})
+        addon = outbox.enqueue_follow_up(quote, QuoteOutbox.ADDON, {'Qty': 2})
+        self.post.return_value = api_response(422)
+        self.assertEqual(outbox.deliver_due(), (0, 1))
+        self.assertEqual(
+            set(quote.follow_ups.values_list('status', flat=True)), {QuoteOutbox.FAILED},
+        )
+        addon.refresh_from_db()
+        self.assertIn(str(quote.key), addon.last_error)
+        self.assertFalse(outbox._due().exists())
+
+    def test_row_is_claimed_only_once(self):
+        quote = outbox.enqueue_quote({'Company': 'ACME'})
+        other_worker = QuoteOutbox.objects.get(pk=quote.pk)
+        self.assertTrue(outbox._claim(quote))
+        self.assertFalse(outbox._claim(other_worker))
+        # The lease keeps it from being due meanwhile
+        self.assertFalse(outbox._due().exists())
+
+
+@override_settings(CART_MAX_LINES=2)
+class CartAPITests(TestCase):
+    def setUp(self):
+        self.client = Client(enforce_csrf_checks=True)
+        # Every item is in the catalog except 999
+        patcher = mock.patch(
+            'industrialpartner.views.known_items', side_effect=lambda ids: {str(i) for i in ids} - {'999'},
+        )
+        self.known_items = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, operations, token):
+        return self.client.post(
+            reverse('cart_items'), json.dumps({'operations': operations}),
+            content_type='application/json', HTTP_X_CSRFTOKEN=token,
+        )
+
+    def test_get_returns_cart_and_csrf_token(self):
+        response = self.client.get(reverse('cart_items'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['items'], {})
+        self.assertEqual(data['cart_count'], 0)
+        self.assertTrue(data['csrf_token'])
+
+    def test_post_without_token_is_rejected(self):
+        self.client.get(reverse('cart_items'))
+        response = self.client.post(
+            reverse('cart_items'), json.dumps({'operations': []}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_post_applies_operations_in_order(self):
+        token = self.client.get(reverse('cart_items')).json()['csrf_token']
+        response = self.post([
+            {'op': 'add', 'item_id': 1, 'quantity': 2},
+            {'op': 'add', 'item_id': 1},
+            {'op': 'set', 'item_id': 2, 'quantity': 5},
+            {'op': 'remove', 'item_id': 2},
+        ], token)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['items'], {'1': 3})
+        self.assertEqual(data['errors'], [])
+        # The catalog is asked once for everything added or set
+        self.known_items.assert_called_once_with({1, 2})
+        self.assertEqual(self.client.get(reverse('cart_items')).json()['items'], {'1': 3})
+
+    def test_invalid_operations_are_reported_by_index(self):
+        token = self.client.get(reverse('cart_items')).json()['csrf_token']
+        data = self.post([
+            {'op': 'add', 'item_id': 1},
+            {'op': 'explode', 'item_id': 1},
+            {'op': 'add', 'item_id': 999},
+            {'op': 'set', 'item_id': 2},
+            {'op': 'add', 'item_id': 3},
+            {'op': 'add', 'item_id': 4},
+        ], token).json()
+        self.assertEqual(data['items'], {'1': 1, '3': 1})
+        self.assertEqual([error['index'] for error in data['errors']], [1, 2, 3, 5])
+        self.assertEqual(data['errors'][-1]['error'], "Cart is full")
+
+    def test_malformed_body_is_rejected(self):
+        token = self.client.get(reverse('cart_items')).json()['csrf_token']
+        response = self.client.post(
+            reverse('cart_items'), 'not json', content_type='application/json', HTTP_X_CSRFTOKEN=token,
+        )
+        self.assertEqual(response.status_code, 400)
+        with override_settings(CART_API_MAX_OPERATIONS=1):
+            response = self.post([{'op': 'remove', 'item_id': 1}] * 2, token)
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,168 @@
+# industrialpartner/typeahead.py
+"""
+In-memory prefix index behind the part number autocomplete endpoint.
+
+Each worker keeps a sorted, compact copy of the mirrored part numbers and
+manufacturer names and answers prefix lookups with a binary search, so a
+keystroke never touches the database or the catalog API.  The index is built
+in the background when the worker starts (see ``warm``), or on first use,
+and rebuilt every ``settings.TYPEAHEAD_REFRESH_INTERVAL`` seconds; until the
+first build finishes there are no suggestions, so no request waits for it.
+
+Part numbers are stored as one bytes blob of NUL-separated records plus an
+array of record offsets instead of millions of small Python objects.
+"""
+
+import bisect
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from .models import CatalogItem, CatalogManufacturer
+from .search import normalize_part_number
+
+_index = None
+_build_lock = threading.Lock()
+_refreshing = threading.Event()
+_refreshing_lock = threading.Lock()
+
+
+class _Keys:
+    # Sequence view over the sort keys of a PrefixIndex, for bisect
+    def __init__(self, index):
+        self._index = index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, position):
+        return self._index.record(position)[0]
+
+
+class PrefixIndex:
+    """
+    Sorted (key, label, extra, id) records with prefix lookup.
+
+    Keys must be ASCII; labels and extras are stored UTF-8 encoded.
+    """
+
+    def __init__(self, records):
+        self._ids = array('q')
+        self._offsets = array('Q')
+        chunks = []
+        offset = 0
+        for key, label, extra, record_id in sorted(records):
+            chunk = b'\x00'.join((key.encode('ascii'), label.encode(), extra.encode())) + b'\x00'
+            chunks.append(chunk)
+            self._offsets.append(offset)
+            self._ids.append(record_id)
+            offset += len(chunk)
+        self._offsets.append(offset)
+        self._blob = b''.join(chunks)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def record(self, position):
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return self._blob[start:end - 1].split(b'\x00')
+
+    def search(self, prefix, limit):
+        """
+        Returns up to ``limit`` (label, extra, id) tuples whose key starts with
+        ``prefix``, in key order.
+        """
+        prefix = prefix.encode('ascii')
+        position = bisect.bisect_left(_Keys(self), prefix)
+        results = []
+        while position < len(self) and len(results) < limit:
+            key, label, extra = self.record(position)
+            if not key.startswith(prefix):
+                break
+            results.append((label.decode(), extra.decode(), self._ids[position]))
+            position += 1
+        return results
+
+
+class TypeaheadIndex:
+    def __init__(self):
+        self.built_at = time.monotonic()
+        self.parts = PrefixIndex(
+            (normalize_part_number(part_number), part_number, slug, item_id)
+            for item_id, part_number, slug in CatalogItem.objects.values_list(
+                'ItemID', 'PartNumber', 'Slug'
+            ).iterator(chunk_size=10000)
+            if normalize_part_number(part_number)
+        )
+        self.manufacturers = PrefixIndex(
+            (normalize_part_number(name), name, lookup, manufacturer_id)
+            for manufacturer_id, name, lookup in CatalogManufacturer.objects.values_list(
+                'ManufacturerID', 'Manufacturer', 'Lookup'
+            )
+            if normalize_part_number(name)
+        )
+
+    def is_stale(self):
+        return time.monotonic() - self.built_at > settings.TYPEAHEAD_REFRESH_INTERVAL
+
+
+def _rebuild():
+    global _index
+    try:
+        with _build_lock:
+            _index = TypeaheadIndex()
+    except DatabaseError:
+        # Mirror tables not migrated yet, or the database is unavailable;
+        # get_index() tries again on use
+        pass
+    finally:
+        _refreshing.clear()
+        connection.close()
+
+
+def _refresh_in_background():
+    # Many requests may find the index missing at once; only one builds it
+    with _refreshing_lock:
+        if _refreshing.is_set():
+            return
+        _refreshing.set()
+    threading.Thread(target=_rebuild, name='typeahead-refresh', daemon=True).start()
+
+
+def warm():
+    """
+    Starts building the index in the background; called at worker start.
+    """
+    if _index is None:
+        _refresh_in_background()
+
+
+def get_index():
+    """
+    Returns the current index, or None while the first build is still
+    running.  Starts a background build when there is no index yet or it is
+    older than the refresh interval.
+    """
+    if _index is None or _index.is_stale():
+        _refresh_in_background()
+    return _index
+
+
+def is_ready():
+    return _index is not None
+
+
+def suggest(query, limit):
+    """
+    Returns part number and manufacturer suggestions for a typed prefix.
+    """
+    prefix = normalize_part_number(query)
+    if not prefix:
+        return [], []
+    index = get_index()
+    if index is None:
+        return [], []
+    return index.parts.search(prefix, limit), index.manufacturers.search(prefix, limit)
@@ -1,7 +1,7 @@
 from django.urls import path
 from django.conf import settings
-from django.conf.urls.static import static
 from .views import *
+from . import async_views
 
 from django.urls import path, register_converter
 
@@ -18,6 +18,15 @@ class SlugWithSlashConverter:
 # Register the custom converter
 register_converter(SlugWithSlashConverter, 'slugwithslash')
 
+# Under ASGI the catalog-backed pages are served by their async versions
+if settings.CATALOG_ASYNC_VIEWS:
+    home = async_views.home
+    product = async_views.product
+    all_product = async_views.all_product
+    search_items = async_views.search_items
+    filter_view = async_views.filter_view
+    sitemap_products = async_views.sitemap_products
+
 urlpatterns = [
     path('', home, name='home'),
     path('manufacturer/<int:manufacturer_id>/', manufacturer_prod, name='manufacturer_prod'),
@@ -28,15 +37,22 @@ urlpatterns = [
     path('quote_request', quote_request, name='quote_request'),
     path('quote_request_cart', quote_request_cart, name='quote_request_cart'),
     path('search/', search_items, name='search_items'),
+    path('search/suggest/', search_suggest, name='search_suggest'),
     path('cart', cart, name='cart'),
     path('contact', contact, name='contact'),
     path('about', about, name='about'),
     path('ser_rqst', ser_rqst, name='ser_rqst'),
-    path('&/<int:quote_id>/', success, name='success'),
+    path('&/<uuid:key>/', success, name='success'),
+    path('&/<uuid:key>/status/', quote_status, name='quote_status'),
     path('cart/count/', cart_count, name='cart_count'),
+    path('cart/items/', cart_items, name='cart_items'),
+    path('cart/bom/', bom_upload, name='bom_upload'),
     #path('<str:manufacturer>/', manufacturer_prod_page, name='manufacturer_prod_page'),
     path('filtered', filter_view, name='filter_view'),
+    path('sitemap', sitemap, name='sitemap'),
+    path('manufacturers/directory/', manufacturer_directory, name='manufacturer_directory'),
     path('sitemap_products/<str:manufacturer>/', sitemap_products, name='sitemap_products'),
+    path('sitemap.xml', sitemap_file, name='sitemap_index'),
+    path('sitemaps/<str:filename>', sitemap_file, name='sitemap_file'),
 ]
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Static and media files are served by industrialpartner.middleware.StaticFilesMiddleware
\ No newline at end of file
@@ -1,7 +1,5 @@
 # industrialpartner/utils.py
 
 def calculate_cart_count(cart):
-    total_count = 0
-    for item_id, item_data in cart.items():
-        total_count += item_data['quantity']
-    return total_count
+    # cart is the session's compact {item_id: quantity} map
+    return sum(cart.values())
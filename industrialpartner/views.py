@@ -1,17 +1,29 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.db import transaction
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 import requests
-from django.http import HttpResponse, JsonResponse, HttpResponseRedirect
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, HttpResponseRedirect
 from .forms import QuoteRequestForm, QuoteRequestFormCart, QuoteAddon, QuoteAddonInfo
-from .models import Product
+from .models import QuoteOutbox
 from django.contrib import messages
 from django.utils.safestring import mark_safe
-from django.urls import reverse
-from django.views.decorators.cache import cache_page
+from django.urls import reverse, NoReverseMatch
+from django.conf import settings
+from django.views.decorators.cache import cache_control, never_cache
 from urllib.parse import urlparse, urlunparse, urlunsplit
+from django.middleware.csrf import get_token
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_http_methods
+from django.utils.cache import add_never_cache_headers, patch_cache_control, patch_vary_headers
+from datetime import datetime, timezone
+import json
+import os
 import re
 
+from . import bom, catalog, directory, featured, outbox, search, sitemaps, typeahead
+from .cart import ADD, OPERATIONS, REMOVE, SET, Cart, known_items
+from .middleware import cache_page
+
 def get_subdomain(request):
     """
     Extracts the subdomain from the request URL.
@@ -47,29 +59,35 @@ def get_client_ip(request):
         ip = request.META.get('REMOTE_ADDR')
     return ip
 
-def fetch_data(url):
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    return {}
+def fetch_data(path, params=None):
+    return catalog.get_json(path, params) or {}
 
-def get_paginated_data(api_endpoint, page, additional_params=None):
-    if additional_params:
-        api_endpoint += additional_params
-    return fetch_data(f"{api_endpoint}&page={page}")
+def get_paginated_data(path, page, additional_params=None):
+    params = dict(additional_params or {}, page=page)
+    return fetch_data(path, params)
 
 def is_ip_address(netloc):
     # Regular expression to check if the netloc is an IP address
     ip_pattern = re.compile(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$')
     return ip_pattern.match(netloc) is not None
 
-@cache_page(60 * 15)  # Cache the view for 15 minutes
-def home(request):
+def get_manufacturer_subdomain(request):
+    # Like get_subdomain, but a bare IP address never counts as a subdomain
     full_url = request.build_absolute_uri()
     parsed_url = urlparse(full_url)
     netloc = parsed_url.netloc
     parts = netloc.split('.')
-    subdomain = parts[0] if parts and len(parts) > 1 and not is_ip_address(netloc) else None
+    return parts[0] if parts and len(parts) > 1 and not is_ip_address(netloc) else None
+
+def manufacturer_lookup_params(manufacturer, part_number=''):
+    params = {'manufacturer_lookup': manufacturer}
+    if part_number:
+        params['part_number'] = part_number
+    return params
+
+@cache_page(60 * 15)  # Cache the view for 15 minutes
+def home(request):
+    subdomain = get_manufacturer_subdomain(request)
 
     page_number = request.GET.get('page', 1)
     part_number = request.GET.get('part_number', '')
@@ -77,16 +95,16 @@ def home(request):
 
     if subdomain:
         manufacturer = subdomain.upper()
-        additional_params = f"&part_number={part_number}" if part_number else ""
-        data = get_paginated_data(f"http://174.46.4.71/items?manufacturer_lookup={manufacturer}", page_number, additional_params)
+        additional_params = manufacturer_lookup_params(manufacturer, part_number)
+        data = get_paginated_data('/items', page_number, additional_params)
 
         if not data.get('items'):
-            data = fetch_data(f"http://174.46.4.71/manufacturer?brand_name={brand_name}&page={page_number}")
+            data = get_paginated_data('/manufacturer', page_number, {'brand_name': brand_name})
             return render_index_page(request, data, brand_name, page_number)
         else:
             return render_manufacturer_page(request, data, manufacturer, page_number, part_number)
     else:
-        data = fetch_data(f"http://174.46.4.71/manufacturer?brand_name={brand_name}&page={page_number}")
+        data = get_paginated_data('/manufacturer', page_number, {'brand_name': brand_name})
         return render_index_page(request, data, brand_name, page_number)
 
 def render_index_page(request, data, brand_name, page_number):
@@ -102,7 +120,7 @@ def render_index_page(request, data, brand_name, page_number):
     except EmptyPage:
         current_page = paginator.page(paginator.num_pages)
 
-    products = Product.objects.all()
+    products = featured.featured_products()
 
     context = {
         'manufacturers': current_page,
@@ -147,15 +165,12 @@ def render_manufacturer_page(request, data, manufacturer, page_number, part_numb
 
 #================For the url manufacturer pages not in use===============
 def fetch_paginated_data_manufacturer_page(manufacturer, page, part_number=None):
-    api_endpoint = f"http://174.46.4.71/items?manufacturer={manufacturer}&page={page}"
+    params = {'manufacturer': manufacturer}
     #if part_number of the particular manufacture is queried
     if part_number:
-        api_endpoint += f"&part_number={part_number}"
+        params['part_number'] = part_number
 
-    response = requests.get(api_endpoint)
-    if response.status_code == 200:
-        return response.json()
-    return {}
+    return get_paginated_data('/items', page, params)
 
 def manufacturer_prod_page(request, manufacturer):
     page_number = request.GET.get('page', 1)
@@ -191,15 +206,12 @@ def manufacturer_prod_page(request, manufacturer):
 
 
 def fetch_paginated_data_items(manufacturer_id, page, part_number=None):
-    api_endpoint = f"http://174.46.4.71/items?manufacturer_id={manufacturer_id}&page={page}"
+    params = {'manufacturer_id': manufacturer_id}
     #if part_number of the particular manufacture is queried
     if part_number:
-        api_endpoint += f"&part_number={part_number}"
-        
-    response = requests.get(api_endpoint)
-    if response.status_code == 200:
-        return response.json()
-    return {}
+        params['part_number'] = part_number
+
+    return get_paginated_data('/items', page, params)
 
 def manufacturer_prod(request, manufacturer_id):
     full_url = request.build_absolute_uri()
@@ -271,63 +283,56 @@ def manufacturer_prod(request, manufacturer_id):
 
 @cache_page(60 * 30)  # Cache the view for 30 minutes
 def product(request, item_id, slug):
-    api_endpoint = f"http://174.46.4.71/items/{item_id}"
-    
     try:
-        # Make a GET request to the API endpoint
-        response = requests.get(api_endpoint)
-        response.raise_for_status()  # Raise an exception for non-200 status codes
-        
-        # Convert the response to JSON format
-        item_data = response.json()
-
-        product_url = request.build_absolute_uri()
-
-        Feature_List = [feature['Feature'] for feature in item_data['Features']]
-        Intro = item_data['Introductions'][0]['Introduction'] if item_data and item_data['Introductions'] else ""
-        manufacturer_info = item_data['Manufacturer']['Synopsis'] if item_data else "N/A"
-        manufacturer_id = item_data['Manufacturer']['ManufacturerID']
-        manufacturer = item_data['Manufacturer']['Manufacturer']
-        simpletype = item_data['SimpleTypes'][0]['SimpleType']
-
-        #For Related Product
-        data = fetch_paginated_data_items(manufacturer_id, page=1)
-        items = data.get('items', [])
-
-        first_three_items = items[:3]
+        # Fetch the item through the catalog data cache; raises for non-200 status codes
+        item_data = catalog.fetch_json(f"/items/{item_id}")
 
         # Check if the provided slug matches the slug from the API
         if slug != item_data.get('Slug'):
             return HttpResponse("Invalid slug", status=404)
 
-        # Pass the item data to the template
-        context = {
-            'item_data': item_data,
-            'Feature_List': Feature_List,
-            'Intro': Intro,
-            'manufacturer_info': manufacturer_info,
-            'manufacturer_id': manufacturer_id,
-            'manufacturer': manufacturer,
-            'first_three_items': first_three_items,
-            'simpletype':simpletype,
-            'product_url':product_url,
-        }
-
-        # Render the template with the item data
-        return render(request, 'industrialpartner/product-page-2.html', context)
+        #For Related Product
+        data = fetch_paginated_data_items(item_data['Manufacturer']['ManufacturerID'], page=1)
+
+        return render_product_page(request, item_data, data)
 
     except requests.RequestException as e:
         # Handle any errors that occur during the request
         error_message = f"Failed to fetch data from API: {str(e)}"
-        return HttpResponse(error_message, status=response.status_code)
+        return HttpResponse(error_message, status=catalog.error_status(e))
+
+def render_product_page(request, item_data, related_data):
+    product_url = request.build_absolute_uri()
+
+    Feature_List = [feature['Feature'] for feature in item_data['Features']]
+    Intro = item_data['Introductions'][0]['Introduction'] if item_data and item_data['Introductions'] else ""
+    manufacturer_info = item_data['Manufacturer']['Synopsis'] if item_data else "N/A"
+    manufacturer_id = item_data['Manufacturer']['ManufacturerID']
+    manufacturer = item_data['Manufacturer']['Manufacturer']
+    simpletype = item_data['SimpleTypes'][0]['SimpleType']
+
+    items = related_data.get('items', [])
+    first_three_items = items[:3]
+
+    # Pass the item data to the template
+    context = {
+        'item_data': item_data,
+        'Feature_List': Feature_List,
+        'Intro': Intro,
+        'manufacturer_info': manufacturer_info,
+        'manufacturer_id': manufacturer_id,
+        'manufacturer': manufacturer,
+        'first_three_items': first_three_items,
+        'simpletype':simpletype,
+        'product_url':product_url,
+    }
+
+    # Render the template with the item data
+    return render(request, 'industrialpartner/product-page-2.html', context)
 
 
 def fetch_paginated_data_all_items(page):
-    api_endpoint = f"http://174.46.4.71/items?page={page}"
-    response = requests.get(api_endpoint)
-    if response.status_code == 200:
-        return response.json()
-    return {}
+    return get_paginated_data('/items', page)
 
 
 def all_product(request):
@@ -337,6 +342,9 @@ def all_product(request):
     # Fetch data from the API
     data = fetch_paginated_data_all_items(page_number)
 
+    return render_all_product_page(request, data, page_number)
+
+def render_all_product_page(request, data, page_number):
     items = data.get('items', [])
     total_items = data.get('total', 0)
     page_size = data.get('size', 50)
@@ -360,17 +368,17 @@ def all_product(request):
     return render(request, 'industrialpartner/main-2.html', context)
 
 @csrf_exempt
-def success(request, quote_id):
-
-    quote_id = request.session.get('quote_id')
+def success(request, key):
+    submission = get_object_or_404(QuoteOutbox, key=key, kind=QuoteOutbox.QUOTE)
+    quote_id = submission.quote_id
 
     if request.method == 'POST':
         form = QuoteAddon(request.POST)
         form_info = QuoteAddonInfo(request.POST)
 
-        if form.is_valid() and form_info.is_valid:
+        if form.is_valid() and form_info.is_valid():
+            # QuoteID is filled in by the outbox once the quote has one
             data = {
-                "QuoteID": form.cleaned_data['quote_id'],
                 "Address1": form.cleaned_data['address1'],
                 "Address2": form.cleaned_data['address2'],
                 "City": form.cleaned_data['city'],
@@ -381,49 +389,41 @@ def success(request, quote_id):
                 "Comments": form.cleaned_data['comments'],
                 "QuotePurposeID": form.cleaned_data['purpose']
             }
-
-            api_endpoint = f"http://174.46.4.71/quotes/addon/{quote_id}"
-            try:
-                response = requests.post(api_endpoint, json=data)
-                response.raise_for_status()
-                response_data = response.json()  # Parse the JSON response
-
-                messages.success(request, 'Thank You for your Submission!')
-                return redirect('success', quote_id=quote_id)
-            
-            except requests.RequestException as e:
-                error_message = f"Failed to send quote request: {str(e)}"
-                return HttpResponse(error_message, status=response.status_code)  
-    else:
-        form = QuoteAddon()
-
-
-    if request.method == 'POST':
-        form_info = QuoteAddonInfo(request.POST)
-        if form_info.is_valid():
             data_info = {
-                "QuoteID": form_info.cleaned_data['quote_id'],
                 "QuotingTime": form_info.cleaned_data['response'],
                 "EquipmentConditionID": form_info.cleaned_data['condition']
             }
-            api_endpoint_info = f"http://174.46.4.71/quotes/request-info/{quote_id}"
-            try:
-                response_info = requests.post(api_endpoint_info, json=data_info)
-                response_info.raise_for_status()
-            except requests.RequestException as e:
-                error_message = f"Failed to send quote request: {str(e)}"
-                return HttpResponse(error_message, status=response.status_code)        
+            with transaction.atomic():
+                outbox.enqueue_follow_up(submission, QuoteOutbox.ADDON, data)
+                outbox.enqueue_follow_up(submission, QuoteOutbox.REQUEST_INFO, data_info)
+
+            messages.success(request, 'Thank You for your Submission!')
+            return redirect('success', key=submission.key)
     else:
+        form = QuoteAddon()
         form_info = QuoteAddonInfo()
 
-
     context = {
         'quote_id': quote_id,
+        'submission': submission,
         'form': form,
         'form_info':form_info
     }
     return render(request, 'industrialpartner/success-page.html', context)
 
+@never_cache
+def quote_status(request, key):
+    # Polled by the success page until the API has assigned a QuoteID
+    submission = get_object_or_404(QuoteOutbox, key=key, kind=QuoteOutbox.QUOTE)
+    return JsonResponse({'quote_id': submission.quote_id, 'status': submission.status})
+
+
+def quote_request_info(request):
+    return {
+        "IPAddress": get_client_ip(request),
+        "Source": 'www.industrialpartner.com',
+        "IsFirstRFQ": 0
+    }
 
 @csrf_exempt
 def quote_request(request):
@@ -447,44 +447,16 @@ def quote_request(request):
                 ]
             }
 
-            api_endpoint = "http://174.46.4.71/quotes"
-            try:
-                response = requests.post(api_endpoint, json=data)
-                response.raise_for_status()
-                response_data = response.json()  # Parse the JSON response
-
-                # Extract the QuoteID from the response data
-                quote_id = response_data.get('QuoteID')
-
-                # Store the quote_id in the session
-                request.session['quote_id'] = quote_id
+            # Stored locally and delivered to the API in the background
+            submission = outbox.enqueue_quote(data, quote_request_info(request))
 
-                ip = get_client_ip(request)
+            # Use Django messages to pass the success quote request
+            #message = 'Your Quote Request has been Submitted.<br>We would get back with you shortly'
+            #messages.add_message(request, messages.SUCCESS, mark_safe(message), extra_tags='quote_request')
 
-                data_info = {
-                        "QuoteID": quote_id,
-                        "IPAddress": ip,
-                        "Source": 'www.industrialpartner.com',
-                        "IsFirstRFQ": 0
-                    }
-                api_endpoint_info = f"http://174.46.4.71/quotes/request-info/{quote_id}"
-                try:
-                    response_info = requests.post(api_endpoint_info, json=data_info)
-                    response_info.raise_for_status()
-                except requests.RequestException as e:
-                    return HttpResponse( status=response.status_code)
-            
-                # Use Django messages to pass the success quote request
-                #message = 'Your Quote Request has been Submitted.<br>We would get back with you shortly'
-                #messages.add_message(request, messages.SUCCESS, mark_safe(message), extra_tags='quote_request')
-
-                # Redirect back to the referring page
-                #referer = request.META.get('HTTP_REFERER', '/')
-                return redirect('success', quote_id=quote_id)
-            
-            except requests.RequestException as e:
-                error_message = f"Failed to send quote request: {str(e)}"
-                return HttpResponse(error_message, status=response.status_code)
+            # Redirect back to the referring page
+            #referer = request.META.get('HTTP_REFERER', '/')
+            return redirect('success', key=submission.key)
     else:
         form = QuoteRequestForm()
 
@@ -493,56 +465,76 @@ def quote_request(request):
 
 def search_items(request):
     part_number = request.GET.get('part_number', '')
+    page_number = request.GET.get('page', 1)
 
-    if part_number:
-        api_endpoint = f"http://174.46.4.71/items?part_number={part_number}"
+    if part_number and search.is_available():
+        # Local full-text index: ranked, paginated and independent of the API
+        data = search.search(part_number, page_number)
+    elif part_number:
         try:
-            response = requests.get(api_endpoint)
-            response.raise_for_status()
-            items = response.json().get('items', [])
+            data = catalog.fetch_json('/items', {'part_number': part_number, 'page': page_number})
         except requests.RequestException as e:
-            return HttpResponse(f"Failed to fetch data from API: {str(e)}", status=response.status_code)
+            return HttpResponse(f"Failed to fetch data from API: {str(e)}", status=catalog.error_status(e))
     else:
-        items = []
+        data = {}
 
-    return render(request, 'industrialpartner/main-2.html', {'items': items})
+    return render_search_page(request, data, part_number)
 
-
-def fetch_product_details_from_api(item_id):
-    # Function to fetch product details from the API based on item_id
-    api_endpoint = f"http://174.46.4.71/items/{item_id}"
-    response = requests.get(api_endpoint)
-    if response.status_code == 200:
-        return response.json()
-    return None
+def render_search_page(request, data, part_number):
+    context = {
+        'items': data.get('items', []),
+        'total_pages': data.get('pages', 1),
+        'current_page': int(data.get('page', 1)),
+        'part_number': part_number,
+    }
+    return render(request, 'industrialpartner/main-2.html', context)
 
 
-def add_to_cart(request, item_id):
-    # Fetch product details from the API using the fetch_product_details_from_api function
-    product_details = fetch_product_details_from_api(item_id)
+def product_url_or_none(item_id, slug):
+    try:
+        return reverse('product', args=[item_id, slug])
+    except NoReverseMatch:
+        return None
 
-    if product_details:
-        # Retrieve the cart from the session
-        cart = request.session.get('cart', {})
 
-        # Add the item to the cart or increment its quantity if it's already there
-        if item_id in cart:
-            cart[item_id]['quantity'] += 1
-        else:
-            cart[item_id] = {
-                'PartNumber': product_details.get('PartNumber', 'N/A'),
-                'Description': product_details.get('Description', 'N/A'),
-                'quantity': 1
-            }
+def search_suggest(request):
+    # Autocomplete for the part number search boxes, answered from the
+    # in-memory prefix index without touching the database or the API
+    query = request.GET.get('q', '')
+    try:
+        limit = int(request.GET.get('limit', settings.TYPEAHEAD_LIMIT))
+    except ValueError:
+        limit = settings.TYPEAHEAD_LIMIT
+    limit = min(max(limit, 1), settings.TYPEAHEAD_MAX_LIMIT)
+
+    parts, manufacturers = typeahead.suggest(query, limit)
+    response = JsonResponse({
+        'parts': [
+            {'part_number': part_number, 'item_id': item_id, 'url': product_url_or_none(item_id, slug)}
+            for part_number, slug, item_id in parts
+        ],
+        'manufacturers': [
+            {'manufacturer': name, 'lookup': lookup, 'manufacturer_id': manufacturer_id}
+            for name, lookup, manufacturer_id in manufacturers
+        ],
+    })
+    if typeahead.is_ready():
+        patch_cache_control(response, public=True, max_age=300)
+    else:
+        # Empty only because the index is still being built
+        add_never_cache_headers(response)
+    return response
 
-        # Save the updated cart back to the session
-        request.session['cart'] = cart
 
-    # Calculate total cart count
-    cart_count = calculate_cart_count(cart)
+def add_to_cart(request, item_id):
+    # Only the item ID and quantity go into the session; details are looked
+    # up when the cart is displayed
+    if Cart(request.session).add(item_id):
+        message = f'Cart updated.<br> Change quantity of item in Shopping Cart'
+    else:
+        message = f'Your cart is full.<br> Request a quote for the items in your Shopping Cart first'
 
     # Use Django messages to pass the updated cart count
-    message = f'Cart updated.<br> Change quantity of item in Shopping Cart'
     messages.add_message(request, messages.SUCCESS, mark_safe(message), extra_tags='add_cart')
 
 
@@ -551,36 +543,161 @@ def add_to_cart(request, item_id):
     return redirect(referer)
 
 def cart(request):
-    cart = request.session.get('cart', {})
-    cart_count = sum(item['quantity'] for item in cart.values())
+    cart = Cart(request.session)
     context = {
-        'cart': cart,
-        'cart_count': cart_count,
+        'cart': cart.lines(),
+        'cart_count': cart.count(),
     }
-    return render(request, 'industrialpartner/cart.html', {'cart': cart})
-
-def calculate_cart_count(cart):
-    total_count = 0
-    for item_id, item_data in cart.items():
-        total_count += item_data['quantity']
-    return total_count
+    return render(request, 'industrialpartner/cart.html', context)
 
+@never_cache
 def cart_count(request):
-    cart = request.session.get('cart', {})
-    cart_count = calculate_cart_count(cart)
-    return JsonResponse({'cart_count': cart_count})
+    # Per-visitor header state, fetched by the base templates after page load
+    # so the page HTML itself carries nothing session specific
+    cart_count = Cart(request.session).count()
+
+    cart_messages = []
+    for message in messages.get_messages(request):
+        if 'add_cart' in message.tags:
+            cart_messages.append(str(message.message))
+        else:
+            # Leave other messages for the page that displays them
+            messages.add_message(request, message.level, message.message, extra_tags=message.extra_tags)
+
+    return JsonResponse({'cart_count': cart_count, 'messages': cart_messages})
+
+def parse_cart_operation(operation):
+    # Returns (op, item_id, quantity) or raises ValueError with the reason
+    if not isinstance(operation, dict):
+        raise ValueError("Operation must be an object")
+    op = operation.get('op')
+    if op not in OPERATIONS:
+        raise ValueError(f"Unknown op {op!r}")
+    if op == SET and 'quantity' not in operation:
+        raise ValueError("set needs a quantity")
+    try:
+        item_id = int(operation.get('item_id'))
+        quantity = int(operation.get('quantity', 1 if op == ADD else 0))
+    except (TypeError, ValueError):
+        raise ValueError("item_id and quantity must be integers")
+    if item_id <= 0:
+        raise ValueError("Invalid item_id")
+    if quantity < 0 or (op == ADD and quantity == 0):
+        raise ValueError("Invalid quantity")
+    return op, item_id, quantity
+
+
+@never_cache
+@require_http_methods(['GET', 'POST'])
+def cart_items(request):
+    """
+    JSON cart API.  GET returns the cart; POST applies many changes in one
+    request and returns the updated cart:
 
-def remove_from_cart(request, item_id):
-    # Convert item_id to string to match the key in the session dictionary
-    item_id = str(item_id)
-    
-    # Retrieve the cart from the session
-    cart = request.session.get('cart', {})
+        {"operations": [{"op": "add", "item_id": 123, "quantity": 2},
+                        {"op": "set", "item_id": 456, "quantity": 10},
+                        {"op": "remove", "item_id": 789}]}
 
-    # Remove the item if it exists in the cart
-    if item_id in cart:
-        del cart[item_id]
-        request.session['cart'] = cart
+    Operations are applied in order.  Items that are added or set are checked
+    against the catalog in one batch first; operations that fail validation
+    are skipped and reported under ``errors`` with their index.
+
+    Every response carries ``csrf_token``, the token to send in the
+    ``X-CSRFToken`` header of the next POST.  The CSRF cookie is HttpOnly, so
+    scripts cannot read it from there.
+    """
+    cart = Cart(request.session)
+    errors = []
+    if request.method == 'POST':
+        try:
+            operations = json.loads(request.body).get('operations')
+        except (ValueError, AttributeError):
+            operations = None
+        if not isinstance(operations, list):
+            return JsonResponse({'error': "Expected a JSON object with an 'operations' list"}, status=400)
+        if len(operations) > settings.CART_API_MAX_OPERATIONS:
+            return JsonResponse(
+                {'error': f"At most {settings.CART_API_MAX_OPERATIONS} operations per request"}, status=400,
+            )
+
+        parsed = []
+        for index, operation in enumerate(operations):
+            try:
+                parsed.append((index, parse_cart_operation(operation)))
+            except ValueError as e:
+                errors.append({'index': index, 'error': str(e)})
+
+        known = known_items({item_id for _, (op, item_id, _) in parsed if op != REMOVE})
+        valid = []
+        for index, (op, item_id, quantity) in parsed:
+            if op != REMOVE and str(item_id) not in known:
+                errors.append({'index': index, 'error': "Unknown or unavailable item"})
+            else:
+                valid.append((index, (op, item_id, quantity)))
+
+        for rejected in cart.apply([operation for _, operation in valid]):
+            errors.append({'index': valid[rejected][0], 'error': "Cart is full"})
+        errors.sort(key=lambda error: error['index'])
+
+    return JsonResponse({
+        'items': cart.items, 'cart_count': cart.count(), 'errors': errors, 'csrf_token': get_token(request),
+    })
+
+@never_cache
+@require_http_methods(['POST'])
+def bom_upload(request):
+    """
+    Resolves an uploaded BOM (CSV with part number and quantity columns)
+    against the catalog and returns its matched, ambiguous, unmatched and
+    unavailable lines.  With ``add_to_cart`` set the matched lines are added
+    to the cart as well; a form post that does not ask for JSON then goes
+    back to the cart page.  When the catalog could not be asked about any
+    line the answer is a 503, so the upload can be retried later.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': "Upload a CSV file in the 'file' field"}, status=400)
+    if upload.size > settings.BOM_MAX_FILE_SIZE:
+        return JsonResponse({'error': f"The file is larger than {settings.BOM_MAX_FILE_SIZE} bytes"}, status=400)
+    try:
+        lines, skipped = bom.read_bom(upload.file)
+    except bom.BOMError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    result = bom.resolve_bom(lines)
+    result['skipped'] = skipped
+    unavailable = result[bom.UNAVAILABLE]
+    if unavailable and not any(result[status] for status in (bom.MATCHED, bom.AMBIGUOUS, bom.UNMATCHED)):
+        response = JsonResponse(
+            {'error': "The catalog cannot be reached right now; try the upload again shortly", **result},
+            status=503,
+        )
+        response['Retry-After'] = str(settings.CATALOG_BREAKER_RESET_TIMEOUT)
+        return response
+
+    if request.POST.get('add_to_cart'):
+        cart = Cart(request.session)
+        matched = result[bom.MATCHED]
+        operations = [(ADD, line['item']['item_id'], line['quantity']) for line in matched]
+        rejected = set(cart.apply(operations))
+        for index in rejected:
+            matched[index]['error'] = "Cart is full"
+        result['cart_count'] = cart.count()
+
+        if 'application/json' not in request.headers.get('Accept', ''):
+            message = (
+                f"{len(matched) - len(rejected)} BOM line(s) added to the cart.<br> "
+                f"{len(result[bom.AMBIGUOUS])} need a closer look, {len(result[bom.UNMATCHED])} were not found"
+            )
+            if unavailable:
+                message += f", {len(unavailable)} could not be checked right now"
+            messages.add_message(request, messages.SUCCESS, mark_safe(message), extra_tags='add_cart')
+            return redirect('cart')
+
+    return JsonResponse(result)
+
+def remove_from_cart(request, item_id):
+    Cart(request.session).remove(item_id)
 
     # Redirect back to the cart page
     return redirect('cart')
@@ -626,23 +743,17 @@ def quote_request_cart(request):
             #print("Data to be sent to the API:")
             #print(data)
 
-            # Temporarily comment out the API request for debugging
-            api_endpoint = "http://174.46.4.71/quotes"
-            try:
-                response = requests.post(api_endpoint, json=data)
-                response.raise_for_status()
+            # Stored locally and delivered to the API in the background
+            submission = outbox.enqueue_quote(data)
 
-                # Clear cart session after successful quote request
-                request.session['cart'] = {}
+            # Clear cart session after the quote request is stored
+            Cart(request.session).clear()
 
-                 # Use Django messages to pass the updated cart count
-                messages.success(request, f'Your Quote Request has been Submitted.\nWe would get back with you shortly')
+             # Use Django messages to pass the updated cart count
+            messages.success(request, f'Your Quote Request has been Submitted.\nWe would get back with you shortly')
 
 
-                return redirect('success')
-            except requests.RequestException as e:
-                error_message = f"Failed to send quote request: {str(e)}"
-                return HttpResponse(error_message, status=response.status_code)
+            return redirect('success', key=submission.key)
             #return HttpResponse("Data printed to console. Check the server logs.", status=200)
     else:
         form = QuoteRequestForm()
@@ -651,16 +762,11 @@ def quote_request_cart(request):
 
 
 def fetch_items_by_manufacture_simpletype(manufacturer, simpletype, page):
-    api_endpoint = f"http://174.46.4.71/items"
     params = {
         'manufacturer': manufacturer,
         'simpletype': simpletype,
-        'page': page
     }
-    response = requests.get(api_endpoint, params=params)
-    if response.status_code == 200:
-        return response.json()
-    return {}
+    return get_paginated_data('/items', page, params)
 
 def filter_view(request):
     manufacturer = request.GET.get('manufacturer', '')  # Get manufacturer parameter from query string
@@ -670,6 +776,9 @@ def filter_view(request):
     # Fetch items based on manufacturer and simpletype
     data = fetch_items_by_manufacture_simpletype(manufacturer, simpletype, page_number)
 
+    return render_filter_page(request, data, manufacturer, simpletype, page_number)
+
+def render_filter_page(request, data, manufacturer, simpletype, page_number):
     items = data.get('items', [])
     total_items = data.get('total', 0)
     page_size = data.get('size', 50)
@@ -689,13 +798,32 @@ def filter_view(request):
 
 #SITEMAP LOGIC
 
+@cache_page(60 * 15)  # Cache the view for 15 minutes
+def sitemap(request):
+    # The manufacturer directory is filled in by a single manufacturer_directory call
+    return render(request, 'industrialpartner/sitemap_loading.html')
+
+@cache_control(public=True, max_age=60 * 15)
+def manufacturer_directory(request):
+    """
+    Returns every manufacturer grouped by letter, or a single letter's group
+    with ``?letter=``.
+    """
+    try:
+        data = directory.get_directory()
+    except requests.RequestException as e:
+        return JsonResponse({'error': f"Failed to fetch data from API: {str(e)}"}, status=catalog.error_status(e))
+
+    letter = request.GET.get('letter', '').upper()
+    if letter:
+        if letter not in directory.LETTERS:
+            raise Http404("Unknown letter")
+        data = {'total': data['total'], 'letters': {letter: data['letters'].get(letter, [])}}
+    return JsonResponse(data, json_dumps_params={'separators': (',', ':')})
+
+
 def fetch_item_data_page(manufacturer, page):
-    api_endpoint = f"http://174.46.4.71/items?manufacturer_lookup={manufacturer}&page={page}"
-    #if part_number of the particular manufacture is queried
-    response = requests.get(api_endpoint)
-    if response.status_code == 200:
-        return response.json()
-    return {}
+    return get_paginated_data('/items', page, {'manufacturer_lookup': manufacturer})
 
 #@cache_page(60 * 15)  # Cache the view for 15 minutes
 def sitemap_products(request, manufacturer):
@@ -708,6 +836,51 @@ def sitemap_products(request, manufacturer):
 
     # Initial page load (for non-AJAX requests)
     data = fetch_item_data_page(manufacturer, 1)  # Fetch data for page 1
+    return render_sitemap_page(request, manufacturer, data)
+
+SITEMAP_FILE = re.compile(r'^sitemap(-products-\d+)?\.xml(\.gz)?$')
+
+def sitemap_file_path(request, filename=sitemaps.INDEX_NAME):
+    if not SITEMAP_FILE.match(filename):
+        return None
+    path = os.path.join(settings.SITEMAP_ROOT, filename)
+    # Plain .xml is answered from the precompressed copy when the client takes gzip
+    if not filename.endswith('.gz') and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        if os.path.exists(path + '.gz'):
+            return path + '.gz'
+    return path if os.path.exists(path) else None
+
+def sitemap_etag(request, filename=sitemaps.INDEX_NAME):
+    path = sitemap_file_path(request, filename)
+    if path is None:
+        return None
+    stat = os.stat(path)
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+def sitemap_last_modified(request, filename=sitemaps.INDEX_NAME):
+    path = sitemap_file_path(request, filename)
+    if path is None:
+        return None
+    return datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+
+@condition(etag_func=sitemap_etag, last_modified_func=sitemap_last_modified)
+def sitemap_file(request, filename=sitemaps.INDEX_NAME):
+    # Serves the files written by manage.py build_sitemaps straight from disk
+    path = sitemap_file_path(request, filename)
+    if path is None:
+        raise Http404("Sitemap not found")
+
+    if filename.endswith('.gz'):
+        response = FileResponse(open(path, 'rb'), filename=filename, content_type='application/gzip')
+    else:
+        response = FileResponse(open(path, 'rb'), filename=filename, content_type='application/xml')
+        if path.endswith('.gz'):
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+    patch_cache_control(response, public=True, max_age=settings.SITEMAP_MAX_AGE)
+    return response
+
+def render_sitemap_page(request, manufacturer, data):
     items = data.get('items', [])
     manufacturer_name = items[0]['Manufacturer']['Manufacturer'] if items else ""
 
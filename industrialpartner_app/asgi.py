@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'industrialpartner_app.settings')
 
 application = get_asgi_application()
+
+# Build the part number autocomplete index as soon as the worker starts
+from industrialpartner import typeahead  # noqa: E402
+
+typeahead.warm()
@@ -42,12 +42,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'industrialpartner.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'industrialpartner.middleware.SnapshotMiddleware',
+    'industrialpartner.middleware.CatalogStaleMiddleware',
 ]
 
 ROOT_URLCONF = 'industrialpartner_app.urls'
@@ -63,7 +66,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'industrialpartner.context_processors.cart_count',
+                'industrialpartner.context_processors.catalog_status',
+                'industrialpartner.context_processors.fragment_cache',
             ],
         },
     },
@@ -83,6 +87,51 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# One SQLite file shared by every worker on the host, used for both the page
+# cache and the catalog data cache.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'industrialpartner.cache_backends.SQLiteCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / 'cache.sqlite3'),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+            'MAX_SIZE': 512 * 1024 * 1024,  # bytes
+            'CULL_FREQUENCY': 10,
+        },
+    },
+    # Rendered navbar/footer fragments (industrialpartner.fragments), kept in
+    # each worker's memory: they are the same in every worker and a hit
+    # should cost less than rendering them
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragments',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 500},
+    },
+}
+
+# Part of every fragment cache key, with a hash of the partials and of the
+# static manifest, so fragments of an older release are never served, also
+# when the 'fragments' alias points at a shared cache. Set it per deploy
+# (e.g. to the commit).
+FRAGMENT_CACHE_VERSION = os.environ.get('FRAGMENT_CACHE_VERSION', '')
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Sessions live in the cache above; see industrialpartner.session_backends.
+# 'behind' writes them to the database in batches from a background thread
+# instead of on every request, 'through' on every save. Expired rows are
+# deleted by manage.py purge_sessions.
+SESSION_ENGINE = 'industrialpartner.session_backends'
+SESSION_CACHE_ALIAS = 'default'
+SESSION_WRITE_MODE = os.environ.get('SESSION_WRITE_MODE', 'behind')
+SESSION_WRITE_BEHIND_INTERVAL = 2
+SESSION_PURGE_BATCH_SIZE = 1000
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -132,12 +181,165 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Define your MEDIA_URL
 MEDIA_URL = '/media/'
 
+# WebP derivatives of uploaded product images (industrialpartner.images),
+# made on upload and by manage.py build_image_derivatives
+IMAGE_DERIVATIVE_WIDTHS = [160, 320, 480, 640, 960]
+IMAGE_WEBP_QUALITY = 80
+
+# Homepage product strip (industrialpartner.featured); the cached list is
+# also dropped whenever a Product is saved or deleted
+FEATURED_PRODUCTS_LIMIT = 12
+FEATURED_SUMMARY_LENGTH = 150
+FEATURED_PRODUCTS_TTL = 60 * 60 * 24
+
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# collectstatic writes content-hashed copies of every static file, plus
+# gzipped copies of text assets (industrialpartner.storage). Both roots are
+# served by industrialpartner.middleware.StaticFilesMiddleware: hashed names
+# are cached for a year without revalidation, everything else for
+# STATIC_MAX_AGE / MEDIA_MAX_AGE seconds and then revalidated by ETag.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'industrialpartner.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+STATIC_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_MAX_AGE = 60 * 60
+MEDIA_MAX_AGE = 60 * 60 * 24
+
 # Additional locations of static files
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, '/industrialpartner/static'),
 ]
 
 CSRF_COOKIE_SECURE = True  # Ensure cookies are only sent over HTTPS
-CSRF_COOKIE_HTTPONLY = True  # Ensure cookies are not accessible via JavaScript
\ No newline at end of file
+CSRF_COOKIE_HTTPONLY = True  # Ensure cookies are not accessible via JavaScript
+
+# Catalog API
+CATALOG_API_URL = os.environ.get('CATALOG_API_URL', 'http://174.46.4.71')
+# (connect, read) timeouts in seconds
+CATALOG_API_TIMEOUT = (
+    float(os.environ.get('CATALOG_API_CONNECT_TIMEOUT', 3.05)),
+    float(os.environ.get('CATALOG_API_READ_TIMEOUT', 15)),
+)
+# Keep-alive connections per worker process
+CATALOG_API_POOL_SIZE = int(os.environ.get('CATALOG_API_POOL_SIZE', 10))
+
+# Serve the catalog-backed pages from industrialpartner.async_views. Only worth
+# enabling under the ASGI entry point (see docker-compose.yml), where a worker
+# keeps one event loop and its pooled async client across requests.
+CATALOG_ASYNC_VIEWS = os.environ.get('CATALOG_ASYNC_VIEWS', '') == '1'
+
+# Catalog data cache: seconds a response stays fresh, per endpoint family
+# (see industrialpartner.catalog.endpoint_family). Families not listed here,
+# such as quotes, are never cached.
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TTLS = {
+    'item': 60 * 30,
+    'items': 60 * 15,
+    'manufacturer': 60 * 60,
+}
+# How long past its TTL an entry may still be served while it is refreshed
+CATALOG_CACHE_STALE_TTL = 60 * 60 * 24
+CATALOG_CACHE_REFRESH_WORKERS = 2
+# Concurrent upstream calls for one batched lookup (catalog.get_json_many)
+CATALOG_BATCH_WORKERS = 8
+
+# Catalog mirror (manage.py sync_catalog). When enabled, catalog reads are
+# served from the local tables and only fall back to the API for anything the
+# mirror cannot answer.
+CATALOG_MIRROR_READS = os.environ.get('CATALOG_MIRROR_READS', '') == '1'
+CATALOG_MIRROR_PAGE_SIZE = 50
+
+# Serve search_items from the local full-text index over the catalog mirror
+# (manage.py rebuild_search_index) instead of the API
+CATALOG_LOCAL_SEARCH = os.environ.get('CATALOG_LOCAL_SEARCH', '') == '1'
+
+# Part number autocomplete (industrialpartner.typeahead)
+TYPEAHEAD_LIMIT = 10
+TYPEAHEAD_MAX_LIMIT = 25
+TYPEAHEAD_REFRESH_INTERVAL = 60 * 15  # seconds
+
+# Product sitemaps (manage.py build_sitemaps), served from SITEMAP_ROOT at
+# /sitemap.xml and /sitemaps/
+SITEMAP_ROOT = os.environ.get('SITEMAP_ROOT', os.path.join(BASE_DIR, 'sitemaps'))
+SITEMAP_BASE_URL = os.environ.get('SITEMAP_BASE_URL', 'https://industrialpartner.com')
+SITEMAP_MAX_AGE = 60 * 60 * 12
+
+# Pre-rendered snapshots of the hottest pages (manage.py prerender_pages),
+# served by industrialpartner.middleware.SnapshotMiddleware while younger than
+# PRERENDER_MAX_AGE seconds; older ones are ignored and the page is rendered
+# live again. Run the command more often than PRERENDER_MAX_AGE.
+PRERENDER_ROOT = os.environ.get('PRERENDER_ROOT', os.path.join(BASE_DIR, 'prerendered'))
+# 'home' also renders a manufacturer's listing on its subdomain, and
+# 'filter_view' the manufacturer/type listings linked from it
+PRERENDER_URL_NAMES = ['home', 'product', 'filter_view']
+PRERENDER_TOP = 1000
+PRERENDER_WORKERS = 8
+PRERENDER_MAX_AGE = 60 * 60
+PRERENDER_BROWSER_MAX_AGE = 60 * 15
+
+# A–Z manufacturer directory on the sitemap page (industrialpartner.directory)
+MANUFACTURER_DIRECTORY_WORKERS = 6
+MANUFACTURER_DIRECTORY_TTL = 60 * 60
+
+# Quote outbox (industrialpartner.outbox, manage.py deliver_quotes). Failed
+# deliveries are retried after QUOTE_OUTBOX_BACKOFF seconds, doubling up to
+# QUOTE_OUTBOX_MAX_BACKOFF, and marked failed after QUOTE_OUTBOX_MAX_ATTEMPTS.
+QUOTE_OUTBOX_BACKOFF = 15
+QUOTE_OUTBOX_MAX_BACKOFF = 60 * 60
+QUOTE_OUTBOX_MAX_ATTEMPTS = 25
+QUOTE_OUTBOX_LEASE = 120  # seconds a claimed row stays reserved for its worker
+
+# Circuit breaker per catalog endpoint family (industrialpartner.breaker).
+# Errors, 5xx answers and calls slower than CATALOG_BREAKER_SLOW_CALL seconds
+# count as failures; the circuit opens when at least CATALOG_BREAKER_MIN_CALLS
+# of the last CATALOG_BREAKER_WINDOW calls were seen and
+# CATALOG_BREAKER_FAILURE_RATE of them failed, and lets a probe through after
+# CATALOG_BREAKER_RESET_TIMEOUT seconds.
+CATALOG_BREAKER_WINDOW = 20
+CATALOG_BREAKER_MIN_CALLS = 5
+CATALOG_BREAKER_FAILURE_RATE = 0.5
+CATALOG_BREAKER_SLOW_CALL = 5.0
+CATALOG_BREAKER_RESET_TIMEOUT = 30
+
+# Hedged GETs (industrialpartner.hedging): a call to one of these endpoint
+# families that is slower than the family's recent CATALOG_HEDGE_PERCENTILE
+# latency is sent a second time and the first answer wins. Hedges cost one
+# token from a bucket earning CATALOG_HEDGE_BUDGET tokens per call, i.e. at
+# most that fraction of extra upstream load.
+CATALOG_HEDGE = os.environ.get('CATALOG_HEDGE', '') == '1'
+CATALOG_HEDGE_FAMILIES = ('item', 'items')
+CATALOG_HEDGE_PERCENTILE = 95
+CATALOG_HEDGE_WINDOW = 200  # recent latencies kept per family
+CATALOG_HEDGE_MIN_SAMPLES = 20
+CATALOG_HEDGE_MIN_DELAY = 0.02  # seconds
+CATALOG_HEDGE_BUDGET = 0.05
+CATALOG_HEDGE_BURST = 10
+CATALOG_HEDGE_WORKERS = 16  # threads per process running sync hedges
+
+# Cache fill coalescing: on a miss, one worker takes a lock entry in the data
+# cache and fetches; the others poll for its result every CATALOG_FILL_POLL
+# seconds for up to CATALOG_FILL_WAIT seconds before fetching themselves.
+CATALOG_FILL_LOCK_TIMEOUT = 30
+CATALOG_FILL_WAIT = 10
+CATALOG_FILL_POLL = 0.05
+
+# Session cart: a compact {item_id: quantity} map. The limits keep session
+# rows small.
+CART_MAX_LINES = 200
+CART_MAX_QUANTITY = 9999
+# Operations accepted by one cart/items/ request
+CART_API_MAX_OPERATIONS = 500
+
+# BOM uploads (cart/bom/): CSV files of part numbers and quantities resolved
+# against the catalog, BOM_RESOLVE_WORKERS lookups at a time
+BOM_MAX_FILE_SIZE = 2 * 1024 * 1024
+BOM_MAX_LINES = 1000
+BOM_RESOLVE_WORKERS = 16
+# Candidates listed for a part number without a single exact match
+BOM_MAX_CANDIDATES = 5
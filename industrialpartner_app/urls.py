@@ -17,7 +17,6 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
 
 from django.conf.urls import handler404
 from industrialpartner.views import custom_404
@@ -31,6 +30,4 @@ urlpatterns = [
     path('', include('industrialpartner.urls')),
     #urlconf_url(r'^(?P<manufacturer>\w+)/', include('your_app.urls')),
 ]
-# Serve media files during development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Static and media files are served by industrialpartner.middleware.StaticFilesMiddleware
\ No newline at end of file